@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+# Counts what decoding a JSON array of 1,000,000 elements allocates and keeps: python3 benchmarks/json-allocations.py
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+#pylint: disable=wrong-import-position
+from restsh.__main__ import createBaseEnv
+from restsh.environment import Environment
+from restsh.evaluate import dereference, String
+
+Elements = 1000000
+
+# The kinds of value a typical response is made of, over and over
+Values = [0, 1, 42, 100000, True, False, None, '', 'name', 2.5]
+
+
+def main() -> None:
+    environment = Environment(createBaseEnv(argparse.Namespace(scriptargs=[])))
+    parsejson = dereference(environment.getVariable('parsejson'))
+    text = String(json.dumps([Values[index % len(Values)] for index in range(Elements)]))
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    start = time.perf_counter()
+    decoded = parsejson.call(environment, {'str': text})
+    end = time.perf_counter()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    stats = after.compare_to(before, 'filename')
+    blocks = sum(stat.count_diff for stat in stats)
+    size = sum(stat.size_diff for stat in stats)
+
+    print('%d elements: %d allocations kept (%.1f per element), %.1f MB, %.3fs' %
+        (Elements, blocks, blocks / Elements, size / 1e6, end - start))
+
+    del decoded
+
+
+main()
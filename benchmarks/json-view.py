@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# Times reading one field of a large decoded JSON response, and measures what it allocates on top of the decoded
+# response itself: python3 benchmarks/json-view.py
+import argparse
+import io
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+#pylint: disable=wrong-import-position
+from restsh.__main__ import createBaseEnv
+from restsh.environment import Environment
+from restsh.evaluate import wrap
+from restsh.repl import runScript
+
+Users = 200000
+
+
+# A listing like a Graph API response for a large directory
+def payload() -> str:
+    return json.dumps(
+        { '@odata.context': 'https://graph.microsoft.com/v1.0/$metadata#users'
+        , 'value':
+            [ { 'id': '%08d-0000-0000-0000-000000000000' % index
+              , 'displayName': 'User %d' % index
+              , 'mail': 'user%d@example.com' % index
+              , 'jobTitle': None
+              , 'accountEnabled': index % 3 != 0
+              , 'businessPhones': ['+1 555 %04d' % (index % 10000)]
+              }
+              for index in range(Users)
+            ]
+        })
+
+
+def main() -> None:
+    environment = Environment(createBaseEnv(argparse.Namespace(scriptargs=[])))
+    environment.output = io.StringIO()
+    text = payload()
+    response = json.loads(text)
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    environment.setVariable('response', wrap(response))
+    runScript(environment, 'print(text: response.value[0].id)')
+    end = time.perf_counter()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print('%.1f MB response: response.value[0].id is %s in %.3fs, allocating at most %.1f MB' %
+        (len(text) / 1e6, environment.output.getvalue().strip(), end - start, peak / 1e6))
+
+
+main()
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+# Times the default parser on chains of 50 binary operators: python3 benchmarks/operator-chains.py
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.setrecursionlimit(100000)
+
+#pylint: disable=wrong-import-position
+from restsh.reader import readTokens
+from restsh.parser import parse
+
+Operators = 50
+
+Chains = \
+    { 'plus': ' + '.join(str(index) for index in range(Operators + 1))
+    , 'mixed': ' '.join('%d %s' % (index, '+-*/'[index % 4]) for index in range(Operators)) + ' %d' % Operators
+    , 'concat': ' | '.join('"s%d"' % index for index in range(Operators + 1))
+    , 'compare': ' && '.join('a%d < %d' % (index, index) for index in range(Operators // 2)) + ' && x'
+    }
+
+
+def main() -> None:
+    for name, chain in Chains.items():
+        tokens = readTokens(chain)
+        best = None
+
+        for _ in range(5):
+            start = time.perf_counter()
+            parse(tokens)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+
+        print('%-8s %3d tokens  %.2fms' % (name, len(tokens), best * 1000))
+
+
+main()
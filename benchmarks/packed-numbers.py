@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# Times whole-array arithmetic on 1,000,000 numbers from Python, done element by element with closures and with the
+# element-wise operators, and measures what decoding them keeps: python3 benchmarks/packed-numbers.py
+import argparse
+import io
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+#pylint: disable=wrong-import-position
+from restsh.__main__ import createBaseEnv
+from restsh.environment import Environment
+from restsh.evaluate import dereference, wrap, String
+from restsh.repl import runScript
+
+Elements = 1000000
+
+Scripts = \
+    [ ('sum', 'reduce(arr: xs, fn: \\accum, item. accum + item, base: 0)', 'sum(arr: xs)')
+    , ('scale', 'map(arr: xs, fn: \\item. item * 2)', 'xs * 2')
+    , ('compare', 'map(arr: xs, fn: \\item. item < 500000)', 'xs < 500000')
+    , ('add', 'map(arr: xs, fn: \\item, index. item + ys[index])', 'xs + ys')
+    ]
+
+
+def timed(environment:Environment, code:str) -> float:
+    start = time.perf_counter()
+    runScript(environment, 'let result = %s' % code)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    environment = Environment(createBaseEnv(argparse.Namespace(scriptargs=[])))
+    environment.output = io.StringIO()
+    parsejson = dereference(environment.getVariable('parsejson'))
+    text = String(json.dumps(list(range(Elements))))
+
+    tracemalloc.start()
+    xs = parsejson.call(environment, {'str': text})
+    kept, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    environment.setVariable('xs', xs)
+    environment.setVariable('ys', wrap(list(range(Elements))))
+    print('%d decoded integers kept in %.1f MB' % (Elements, kept / 1e6))
+
+    for name, closures, elementwise in Scripts:
+        print('%-8s closures %.3fs  element-wise %.3fs' %
+            (name, timed(environment, closures), timed(environment, elementwise)))
+
+
+main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# Times the default parser on statements of about 10, 100 and 1000 tokens: python3 benchmarks/parse-sizes.py [sizes...]
+import os
+import sys
+import time
+from typing import Callable, Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.setrecursionlimit(100000)
+
+#pylint: disable=wrong-import-position
+from restsh.reader import readTokens
+from restsh.parser import parse
+
+Sizes = [10, 100, 1000]
+
+
+# `f(a: 0); f(a: 1); ...`
+def block(size:int) -> str:
+    calls:List[str] = []
+
+    while len(readTokens('; '.join(calls))) < size:
+        calls.append('f(a: %d)' % len(calls))
+
+    return '; '.join(calls)
+
+
+# `f(a: f(a: ... x))`
+def nested(size:int) -> str:
+    line = 'x'
+
+    while len(readTokens(line)) < size:
+        line = 'f(a: %s)' % line
+
+    return line
+
+
+Statements:Dict[str, Callable[[int], str]] = {'block': block, 'nested': nested}
+
+
+def main() -> None:
+    sizes = [int(arg) for arg in sys.argv[1:]] or Sizes
+
+    for name, statement in Statements.items():
+        for size in sizes:
+            tokens = readTokens(statement(size))
+            best = None
+
+            for _ in range(3):
+                start = time.perf_counter()
+                parse(tokens)
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+
+            print('%-7s %5d tokens  %.4fs' % (name, len(tokens), best))
+
+
+main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# Compares the throughput of the default parser and the --ng-parser one on the lines of tests/parser-corpus.txt and on
+# a 1000-token statement: python3 benchmarks/parsers.py
+import os
+import sys
+import time
+from typing import Any, Callable, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.setrecursionlimit(100000)
+
+#pylint: disable=wrong-import-position
+from restsh.reader import readTokens
+from restsh.token import Token
+from restsh.parser import parse
+from restsh.ngparser import parse as ngparse
+
+Parsers = {'default': parse, 'ng': ngparse}
+
+
+# The lines of the corpus that parse, as tokens
+def corpus() -> List[List[Token]]:
+    statements = []
+
+    with open(os.path.join(os.path.dirname(__file__), '..', 'tests', 'parser-corpus.txt'), encoding='utf-8') as lines:
+        for line in lines.read().splitlines():
+            try:
+                tokens = readTokens(line)
+                parse(tokens)
+            except Exception: #pylint: disable=broad-except
+                continue
+            statements.append(tokens)
+
+    return statements
+
+
+def best(parser:Callable[[List[Token]], Any], statements:List[List[Token]]) -> float:
+    times = []
+
+    for _ in range(5):
+        start = time.perf_counter()
+        for tokens in statements:
+            parser(tokens)
+        times.append(time.perf_counter() - start)
+
+    return min(times)
+
+
+def main() -> None:
+    statements = corpus()
+    block = [readTokens('; '.join('f(a: %d)' % index for index in range(125)))]
+    count = sum(len(tokens) for tokens in statements)
+
+    for name, parser in Parsers.items():
+        corpusTime = best(parser, statements)
+        blockTime = best(parser, block)
+        print('%-8s corpus %d statements %.0f tokens/s  block %d tokens %.0f tokens/s' %
+            (name, len(statements), count / corpusTime, len(block[0]), len(block[0]) / blockTime))
+
+
+main()
@@ -0,0 +1,26 @@
+#!/bin/bash
+# Times the evaluator benchmarks and runs the Python ones: ./benchmarks/run.sh [script.rsh|script.py ...] (all of them by default)
+cd "$(dirname "$0")/.."
+
+scripts=("$@")
+if [ ${#scripts[@]} -eq 0 ]; then
+    scripts=(benchmarks/*.rsh benchmarks/*.py)
+fi
+
+# Each run has a home of its own, so none of them reads or writes ~/.restsh, or replays a cache an earlier one wrote
+homes=$(mktemp -d)
+trap 'rm -rf "$homes"' EXIT
+
+for script in "${scripts[@]}"; do
+    if [[ "$script" == *.py ]]; then
+        echo "$(basename "$script"):"
+        HOME="$(mktemp -d -p "$homes")" python3 "$script" | sed 's/^/    /'
+        continue
+    fi
+
+    home=$(mktemp -d -p "$homes")
+    start=$(date +%s.%N)
+    result=$(HOME="$home" python3 -m restsh --skip-rc "$script" | tail -1)
+    end=$(date +%s.%N)
+    printf '%-16s %7.3fs  %s\n' "$(basename "$script")" "$(python3 -c "print($end - $start)")" "$result"
+done
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+# Times starting restsh on a script with no cache file (cold) and with the one the cold run left (warm), with both
+# parsers: python3 benchmarks/startup.py [script.rsh ...] (the .rsh benchmarks by default)
+import glob
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List
+
+Root = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+Runs = 3
+
+
+def timed(home:str, script:str, options:List[str]) -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-m', 'restsh', '--skip-rc', *options, script],
+        cwd=Root, env=dict(os.environ, HOME=home), stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, check=True)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    scripts = sys.argv[1:] or sorted(glob.glob(os.path.join(Root, 'benchmarks', '*.rsh')))
+
+    with tempfile.TemporaryDirectory() as home:
+        for script in scripts:
+            with open(script, encoding='utf-8') as source:
+                lines = len(source.readlines())
+
+            for name, options in [('default', []), ('ng', ['--ng-parser'])]:
+                cold = []
+                warm = []
+
+                for _ in range(Runs):
+                    shutil.rmtree(os.path.join(home, '.restsh', 'cache'), ignore_errors=True)
+                    cold.append(timed(home, script, options))
+                    warm.append(timed(home, script, options))
+
+                print('%-16s %5d lines  %-8s cold %.3fs  warm %.3fs' %
+                    (os.path.basename(script), lines, name, statistics.median(cold), statistics.median(warm)))
+
+
+main()
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+# Measures the bytes per parsed statement that the tokens and the parsed Eval trees of 3000 statements keep:
+# python3 benchmarks/statement-sizes.py [statements]
+import os
+import sys
+import tracemalloc
+from typing import Any, Callable
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.setrecursionlimit(100000)
+
+#pylint: disable=wrong-import-position
+from restsh.reader import readTokens
+from restsh.parser import parse
+
+Statements = \
+    [ 'let resp = api.getThing(id: 42, verbose: true)'
+    , 'x = if resp.status == 200 then resp.body.items[0] else null'
+    , 'total = reduce(arr: items, fn: \\accum, item. accum + item.price * item.count, base: 0)'
+    , 'post(url: "/things", body: {name: "widget", tags: ["a", "b"], size: 3.5})'
+    , 'names = map(arr: people, fn: \\person. person.first | " " | person.last)'
+    , 'print(text: "done"); result'
+    ]
+
+
+# What making something keeps, in bytes, along with what was made
+def measure(make:Callable[[], Any]) -> Any:
+    tracemalloc.start()
+    made = make()
+    kept, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return made, kept
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+    lines = [Statements[index % len(Statements)] for index in range(count)]
+
+    tokens, tokenSize = measure(lambda: [readTokens(line, index + 1) for index, line in enumerate(lines)])
+    _, treeSize = measure(lambda: [parse(statement) for statement in tokens])
+    tokenCount = sum(len(statement) for statement in tokens)
+
+    print('%d statements of %.1f tokens: tokens %.0f bytes per statement (%.0f per token), parsed %.0f bytes per '
+        'statement' % (count, tokenCount / count, tokenSize / count, tokenSize / tokenCount, treeSize / count))
+
+
+main()
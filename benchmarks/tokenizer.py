@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+# Times tokenizing a line with an inline JSON body of about 1k, 10k and 100k characters: python3 benchmarks/tokenizer.py
+# [sizes...]
+import os
+import sys
+import time
+from typing import List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+#pylint: disable=wrong-import-position
+from restsh.reader import readTokens
+
+Sizes = [1000, 10000, 100000]
+
+
+# `post(url: "/things", body: {k0: "value 0", k1: 1, k2: [2.5, "x", {a: b.c}], ...})`
+def body(size:int) -> str:
+    properties:List[str] = []
+
+    while len(', '.join(properties)) < size:
+        index = len(properties)
+        value = ['"value %d"' % index, str(index), '[%d.5, "x", {a: b.c}]' % index][index % 3]
+        properties.append('k%d: %s' % (index, value))
+
+    return 'post(url: "/things", body: {%s})' % ', '.join(properties)
+
+
+def main() -> None:
+    sizes = [int(arg) for arg in sys.argv[1:]] or Sizes
+
+    for size in sizes:
+        line = body(size)
+        best = None
+
+        for _ in range(5):
+            start = time.perf_counter()
+            tokens = readTokens(line, 1)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+
+        print('%7d chars %6d tokens  %.4fs  %.1f MB/s' % (len(line), len(tokens), best, len(line) / best / 1e6))
+
+
+main()
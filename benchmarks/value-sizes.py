@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+# Measures the bytes per record of decoding a JSON listing of 1,000,000 records, of reading every record as an object,
+# and of a cell for each of them: python3 benchmarks/value-sizes.py
+import argparse
+import json
+import os
+import sys
+import tracemalloc
+from typing import Any, Callable
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+#pylint: disable=wrong-import-position
+from restsh.__main__ import createBaseEnv
+from restsh.environment import Environment, Cell
+from restsh.evaluate import dereference, Array, Element, String
+
+Records = 1000000
+
+
+# What making something keeps, in bytes per record, along with what was made
+def measure(make:Callable[[], Any]) -> Any:
+    tracemalloc.start()
+    made = make()
+    kept, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return made, kept / Records
+
+
+def main() -> None:
+    environment = Environment(createBaseEnv(argparse.Namespace(scriptargs=[])))
+    parsejson = dereference(environment.getVariable('parsejson'))
+    text = String(json.dumps(
+        [ {'id': index, 'name': 'User %d' % index, 'enabled': index % 3 != 0, 'score': 2.5}
+          for index in range(Records)
+        ]))
+
+    decoded, decodeSize = measure(lambda: parsejson.call(environment, {'str': text}))
+    records:Array = decoded
+    _, readSize = measure(lambda: [records.read(index) for index in range(Records)])
+    _, elementSize = measure(lambda: [Element(records, index) for index in range(Records)])
+    _, cellSize = measure(lambda: [Cell(records.read(index)) for index in range(Records)])
+
+    print('%d records: decoded %.0f, read as objects %.0f more, element cells %.0f, cells %.0f bytes per record' %
+        (Records, decodeSize, readSize, elementSize, cellSize))
+
+
+main()
@@ -3,9 +3,9 @@ import sys
 import os
 from typing import Optional
 from .environment import Environment
-from .repl import repLoop
+from .repl import repLoop, runFile
 from .reader import tabCompleter
-from .evaluate import wrap, Null, Boolean
+from .evaluate import wrap, NullValue, TrueValue, FalseValue
 from .modules import builtins
 from .modules import operators
 from .modules import http
@@ -22,7 +22,8 @@ def setupArguments(args:list) -> argparse.Namespace:
     parser.add_argument('--environment', '-e', action='append', default=[],
         help='A script to run before opening the prompt or running the main script')
     parser.add_argument('--skip-rc', '-s', action='store_true', default=False)
-    #parser.add_argument('--ng-parser', action='store_true', default=False)
+    parser.add_argument('--ng-parser', action='store_true', default=False,
+        help='Use the table driven parser')
     parser.add_argument('--debug-internals', action='store_true', default=False,
         help='Turn on debugging info for the shell itself')
     parser.add_argument('--version', action='store_true', default=False,
@@ -70,10 +71,10 @@ def createBaseEnv(arguments:argparse.Namespace) -> Environment:
 
     environment.setVariable('args', wrap(arguments.scriptargs))
     environment.setVariable('env', wrap({**os.environ}))
-    environment.setVariable('__result', Null())
-    environment.setVariable('null', Null())
-    environment.setVariable('true', Boolean(True))
-    environment.setVariable('false', Boolean(False))
+    environment.setVariable('__result', NullValue)
+    environment.setVariable('null', NullValue)
+    environment.setVariable('true', TrueValue)
+    environment.setVariable('false', FalseValue)
     environment.setVariable('*prompt', '$ ')
     environment.setVariable('*continue', '.  ')
     environment.setVariable('*resultcolor', 'green')
@@ -103,29 +104,21 @@ def main(args:Optional[list]=None):
     # Base the global environment of a base environment.
     environment = Environment(createBaseEnv(arguments))
     environment.globals = True
-    #environment.ngParser = arguments.ng_parser
+    environment.ngParser = arguments.ng_parser
     environment.debugErrors = arguments.debug_internals
     debug.ShowDebug = arguments.debug_internals
 
 
     if not arguments.skip_rc and os.path.exists(rcfile):
-        with open(rcfile, 'r', encoding='utf-8') as rsource:
-            environment.input = rsource
-            repLoop(environment)
-            environment.input = sys.stdin
-            environment.loop = True
+        runFile(environment, rcfile)
+        environment.loop = True
 
     for envFile in arguments.environment:
-        with open(envFile, 'r', encoding='utf-8') as env:
-            environment.input = env
-            repLoop(environment)
-            environment.input = sys.stdin
-            environment.loop = True
+        runFile(environment, envFile)
+        environment.loop = True
 
     if arguments.script:
-        with open(arguments.script, 'r', encoding='utf-8') as script:
-            environment.input = script
-            repLoop(environment)
+        runFile(environment, arguments.script)
 
     else:
         try:
@@ -0,0 +1,88 @@
+from typing import Any, List, Optional, Tuple, Union
+import os
+import hashlib
+import pickle
+from .environment import Environment
+from .parser import precedence
+from .debug import debug
+
+# Scripts are cached in the restsh home directory as the steps running them took, like .pyc files. Nothing removes
+# cache files, or limits their number or size.
+
+# Bump this whenever the cached steps, or the Eval classes in them, change shape
+CacheVersion = 5
+
+Precedence = Tuple[Tuple[str, int], ...]
+
+class PrintStep:
+    __slots__ = ('message', 'error')
+
+    def __init__(self, message:str, error:bool) -> None:
+        self.message = message
+        self.error = error
+
+
+class EvaluateStep:
+    __slots__ = ('firstLine', 'lastLine', 'precedence', 'exprs')
+
+    def __init__(self, firstLine:int, lastLine:int, precedence:Precedence, exprs:bytes) -> None:
+        # The lines the statement came from, counting from 1
+        self.firstLine = firstLine
+        self.lastLine = lastLine
+        # The operator precedence the statement was parsed with; it's parsed again if that's changed
+        self.precedence = precedence
+        # The parsed statement, pickled before it's evaluated
+        self.exprs = exprs
+
+
+Step = Union[PrintStep, EvaluateStep]
+
+
+def currentPrecedence() -> Precedence:
+    return tuple(sorted(precedence.items()))
+
+
+def cachePath(environment:Environment, filename:str) -> str:
+    path = os.path.abspath(filename)
+    digest = hashlib.sha1(path.encode('utf-8')).hexdigest()[:16]
+    return os.path.join(environment.homedir, 'cache', '%s-%s.rshc' % (os.path.basename(path), digest))
+
+
+def sourceKey(filename:str, source:str, parser:str) -> Tuple[Any, ...]:
+    stat = os.stat(filename)
+    digest = hashlib.sha256(source.encode('utf-8')).hexdigest()
+
+    return (CacheVersion, parser, stat.st_mtime_ns, stat.st_size, digest)
+
+
+def loadSteps(environment:Environment, filename:str, key:Tuple[Any, ...]) -> Optional[List[Step]]:
+    try:
+        with open(cachePath(environment, filename), 'rb') as cached:
+            if pickle.load(cached) != key:
+                return None
+            return pickle.load(cached)
+    except FileNotFoundError:
+        return None
+    except Exception as ex: #pylint: disable=broad-exception-caught
+        # A cache file that can't be read is no worse than no cache file
+        debug('Could not load cached %s: %s' % (filename, ex))
+        return None
+
+
+def saveSteps(environment:Environment, filename:str, key:Tuple[Any, ...], steps:List[Step]) -> None:
+    path = cachePath(environment, filename)
+    partial = '%s.%s' % (path, os.getpid())
+
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        with open(partial, 'wb') as cached:
+            pickle.dump(key, cached, pickle.HIGHEST_PROTOCOL)
+            pickle.dump(steps, cached, pickle.HIGHEST_PROTOCOL)
+
+        # Other runs of the same script never see a half written file
+        os.replace(partial, path)
+    except Exception as ex: #pylint: disable=broad-exception-caught
+        debug('Could not cache %s: %s' % (filename, ex))
+        if os.path.exists(partial):
+            os.remove(partial)
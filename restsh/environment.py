@@ -1,6 +1,6 @@
 import sys
 import os.path
-from typing import Dict, Any, Optional, TextIO
+from typing import Dict, Any, List, Optional, TextIO, NoReturn
 from .service import Service
 from . import terminal
 
@@ -8,6 +8,8 @@ class EvaluationError(Exception):
     pass
 
 class Cell:
+    __slots__ = ('value',)
+
     def __init__(self, value:Any) -> None:
         self.value:Any = value.value if isinstance(value, Cell) else value
 
@@ -28,27 +30,78 @@ class Cell:
     def __repr__(self) -> str:
         return repr(self.value)
 
+# What every environment of one interpreter shares: the settings it was started with, and where it reads and writes
+class Context:
+    __slots__ = ('ngParser', 'debugErrors', 'lastError', 'input', 'output')
+
+    def __init__(self) -> None:
+        self.ngParser:bool = False
+        self.debugErrors:bool = False
+        self.lastError:Optional[Any] = None
+        self.input:TextIO = sys.stdin
+        self.output:TextIO = sys.stdout
+
+
 class Environment:
+    __slots__ = ('base', 'context', 'globals', 'loop', 'variables', 'services', 'slots', 'dynamic')
+
     def __init__(self, base:Optional['Environment']=None) -> None:
         #print('environment: %s (base? %s)' % (id(self), base is not None))
         self.base = base
+        self.context:Context = base.context if base is not None else Context()
         self.globals = False
         self.loop:bool = True
-        self.ngParser:bool = False
-        self.debugErrors:bool = False
         self.variables:Dict[str,Any] = {}
-        self.services:Dict[str,Service] = {}
-        self.lastError:Optional[Any] = None
-        self.input:TextIO = sys.stdin
-        self.output:TextIO = sys.stdout
+        self.services:Dict[str,Service] = base.services if base is not None else {}
+        # The cells of the parameters of the closure call this is for, in order
+        self.slots:List[Cell] = []
+        # Whether a variable other than a parameter has been defined here
+        self.dynamic:bool = False
+
+    @property
+    def ngParser(self) -> bool:
+        return self.context.ngParser
+
+    @ngParser.setter
+    def ngParser(self, ngParser:bool) -> None:
+        self.context.ngParser = ngParser
 
-        if base is not None:
-            self.services = base.services
+    @property
+    def debugErrors(self) -> bool:
+        return self.context.debugErrors
+
+    @debugErrors.setter
+    def debugErrors(self, debugErrors:bool) -> None:
+        self.context.debugErrors = debugErrors
+
+    @property
+    def lastError(self) -> Optional[Any]:
+        return self.context.lastError
+
+    @lastError.setter
+    def lastError(self, lastError:Optional[Any]) -> None:
+        self.context.lastError = lastError
+
+    @property
+    def input(self) -> TextIO:
+        return self.context.input
+
+    @input.setter
+    def input(self, input:TextIO) -> None: #pylint: disable=redefined-builtin
+        self.context.input = input
+
+    @property
+    def output(self) -> TextIO:
+        return self.context.output
+
+    @output.setter
+    def output(self, output:TextIO) -> None:
+        self.context.output = output
 
     def print(self, string:str, end='\n') -> None:
         print(string, end=end, file=self.output)
 
-    def error(self, string) -> None:
+    def error(self, string) -> NoReturn:
         terminal.setForeground(self.output, 'red')
         self.print('error: %s' % string)
         terminal.reset(self.output)
@@ -81,6 +134,7 @@ class Environment:
                 self.variables[name] = self.base.variables[name]
             else:
                 self.variables[name] = Cell(None)
+            self.dynamic = True
         self.variables[name].set(value)
         return self.variables[name]
 
@@ -95,3 +149,33 @@ class Environment:
     def getVariableValue(self, name:str) -> Any:
         return self.getVariable(name).value
 
+
+
+# The environment a closure is called in, with nothing but its parameters
+class Frame(Environment):
+    __slots__ = ()
+
+    def __init__(self, base:Environment, params:List[str], args:Dict[str,Any]) -> None: #pylint: disable=super-init-not-called
+        self.base = base
+        self.context = base.context
+        self.services = base.services
+        self.globals = False
+        self.loop = True
+        self.dynamic = False
+
+        # Like setVariable, a parameter with the same name as a variable in the base shares its cell
+        variables:Dict[str,Any] = {}
+        baseVariables = base.variables
+        slots:List[Cell] = []
+
+        for name in params:
+            cell = variables.get(name) or baseVariables.get(name)
+            if cell is None:
+                cell = Cell(args[name])
+            else:
+                cell.set(args[name])
+            variables[name] = cell
+            slots.append(cell)
+
+        self.variables = variables
+        self.slots = slots
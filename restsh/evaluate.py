@@ -1,6 +1,10 @@
-from typing import cast, Union, Dict, Any, List, Callable, Optional
+#pylint: disable=too-many-lines
+from typing import cast, Union, Dict, Any, List, Callable, Optional, Tuple, NoReturn, Iterator, Mapping \
+    , MutableMapping, Sequence
 import re
-from .environment import Environment, Cell, EvaluationError
+import sys
+from array import array as Numbers
+from .environment import Environment, Frame, Cell, EvaluationError
 from .token import Sym, Eq, LParen, RParen, LBrace, LBracket, RBracket \
     , Comma, Colon, SemiColon, Bang, Dot, BSlash \
     , Str, Flt, Int, If, Then, Else, Let, Imp, Help, Ext, Try
@@ -11,7 +15,50 @@ from .module import importModule
 from .debug import debug
 
 
+# An expression compiled into a Python function that evaluates it
+Compiled = Callable[[Environment], Union['Eval', Cell]]
+
+
+# A check that nothing an expression worked out ahead of time depends on has been redefined since
+Guard = Callable[[Environment], bool]
+
+
+# An operator whose builtin works on the values of its sides (see builtinOperators)
+BuiltinOperator = Tuple[
+    Callable[..., Any],
+    Tuple[str, str],
+    Callable[[Any, Any], Any],
+    Optional[Callable[[Any], Union['Eval', Cell]]]
+    ]
+
+
+# The parameters of each closure an expression being compiled is inside, innermost first, to look them up by slot
+class Scope:
+    __slots__ = ('params', 'parent', 'depth')
+
+    def __init__(self, params:List[str], parent:Optional['Scope']) -> None:
+        self.params = params
+        self.parent = parent
+        # How many closures in this is
+        self.depth:int = parent.depth + 1 if parent is not None else 1
+
+    # The depth and slot of the parameter with this name, if there is one
+    def resolve(self, name:str) -> Optional[Tuple[int, int]]:
+        scope:Optional[Scope] = self
+        depth = 0
+
+        while scope is not None:
+            if name in scope.params:
+                return (depth, scope.params.index(name))
+            scope = scope.parent
+            depth += 1
+
+        return None
+
+
 class Eval:
+    __slots__ = ()
+
     #@staticmethod
     #def parse() -> 'Eval':
     #    return Eval()
@@ -19,6 +66,15 @@ class Eval:
     def evaluate(self, environment:Environment) -> Union['Eval', Cell]:
         return self
 
+    # Compiles the expression into nested Python functions, deciding what can be decided once rather than every time.
+    # A closure call compiled as a tail returns a TailCall for the enclosing closure's call to make.
+    def compile(self, scope:Optional[Scope]=None, tail:bool=False) -> Compiled:
+        return self.evaluate
+
+    # The constant the expression always evaluates to, if it's known ahead of time, and the guards it depends on
+    def fold(self, scope:Optional[Scope]=None) -> Optional[Tuple['Constant', Dict[str, Guard]]]:
+        return None
+
     @property
     def interactivePrint(self) -> bool:
         return True
@@ -43,21 +99,87 @@ def dereference(value:Union[Eval, Cell]) -> Eval:
     return value.value if isinstance(value, Cell) else value
 
 
+# A value as arrays and objects keep it: constants as the Python values they wrap, anything else as itself
+def unbox(value:Union[Eval, Cell]) -> Any:
+    value = dereference(value)
+    valueType = type(value)
+
+    if valueType in Unboxed:
+        return value.value #type:ignore
+    elif valueType is Null:
+        return None
+    else:
+        return value
+
+
+# The value an element of an array or object literal always is, unboxed, along with the guards it depends on
+def constantOf(expr:'Eval', scope:Optional[Scope]) -> Optional[Tuple[Any, Dict[str, Guard]]]:
+    if isinstance(expr, (Array, DictObject)) and not expr.evaluated:
+        return expr.constant(scope)
+
+    folded = expr.fold(scope)
+
+    if folded is None:
+        return None
+
+    value, guards = folded
+
+    return (unbox(value), guards)
+
+
+# An element of an array, or property of an object, as a cell that can be assigned to
+class Element(Cell):
+    __slots__ = ('container', 'key')
+
+    def __init__(self, container:Union['Array', 'DictObject'], key:Any) -> None: #pylint: disable=super-init-not-called
+        self.container = container
+        self.key = key
+
+    @property #type:ignore
+    def value(self) -> Any:
+        return self.container.read(self.key)
+
+    @value.setter
+    def value(self, value:Any) -> None:
+        self.container.write(self.key, unbox(value))
+
+
+# An expression worked out ahead of time, evaluated as folded until one of its guards fails
+def guarded(guards:Dict[str, Guard], folded:Compiled, unfolded:Compiled) -> Compiled:
+    checks = list(guards.values())
+    undone = False
+
+    def guardedExpression(environment:Environment) -> Union[Eval, Cell]:
+        nonlocal undone
+
+        if undone:
+            return unfolded(environment)
+
+        for check in checks:
+            if not check(environment):
+                undone = True
+                return unfolded(environment)
+
+        return folded(environment)
+
+    return guardedExpression
+
+
 def wrap(value:Any) -> Eval:
     if isinstance(value, Eval):
         return value
     elif isinstance(value, Cell):
         return value.value
     elif value is None:
-        return Null()
+        return NullValue
     elif isinstance(value, str):
-        return String(value)
+        return String.of(value)
     elif isinstance(value, bool):
-        return Boolean(value)
+        return Boolean.of(value)
     elif isinstance(value, float):
         return Float(value)
     elif isinstance(value, int):
-        return Integer(value)
+        return Integer.of(value)
     elif isinstance(value, list):
         return Array.fromPython(value)
     elif isinstance(value, dict):
@@ -67,6 +189,8 @@ def wrap(value:Any) -> Eval:
 
 
 class Variable(Eval):
+    __slots__ = ('name',)
+
     def __init__(self, name:str) -> None:
         self.name:str = name
 
@@ -83,8 +207,79 @@ class Variable(Eval):
     def evaluate(self, environment:Environment) -> Union[Eval, Cell]:
         return environment.getVariable(self.name)
 
+    def compile(self, scope:Optional[Scope]=None, tail:bool=False) -> Compiled:
+        name = self.name
+
+        if scope is None:
+            def variable(environment:Environment) -> Union[Eval, Cell]:
+                return environment.getVariable(name)
+
+            return variable
+
+        address = scope.resolve(name)
+
+        if address is None and scope.depth == 1:
+            # Defined outside of the closure, so it's looked up by name from where the closure was evaluated
+            def closureVariable(environment:Environment) -> Union[Eval, Cell]:
+                # Something like set(var: "name") can define a variable that hides the one outside
+                if environment.dynamic:
+                    return environment.getVariable(name)
+                base:Environment = environment.base #type:ignore
+                if name in base.variables:
+                    return base.variables[name]
+                return base.getVariable(name)
+
+            return closureVariable
+
+        if address is None:
+            # Likewise, from where the outermost closure was evaluated
+            depth = scope.depth
+
+            def outerVariable(environment:Environment) -> Union[Eval, Cell]:
+                env = environment
+                for _ in range(depth):
+                    if env.dynamic:
+                        return environment.getVariable(name)
+                    env = env.base #type:ignore
+                return env.getVariable(name)
+
+            return outerVariable
+
+        depth, slot = address
+
+        if depth == 0:
+            def parameter(environment:Environment) -> Union[Eval, Cell]:
+                return environment.slots[slot]
+
+            return parameter
+
+        def outerParameter(environment:Environment) -> Union[Eval, Cell]:
+            env = environment
+            for _ in range(depth):
+                if env.dynamic:
+                    return environment.getVariable(name)
+                env = env.base #type:ignore
+            return env.slots[slot]
+
+        return outerParameter
+
+    def fold(self, scope:Optional[Scope]=None) -> Optional[Tuple['Constant', Dict[str, Guard]]]:
+        value = ConstantVariables.get(self.name)
+
+        if value is None:
+            return None
+
+        getValue = self.compile(scope)
+
+        def isConstant(environment:Environment) -> bool:
+            return cast(Constant, value).equal(dereference(getValue(environment)))
+
+        return (value, {self.name: isConstant})
+
 
 class ElementList(Eval):
+    __slots__ = ('elements',)
+
     def __init__(self, elements:List[Eval]) -> None:
         self.elements:List[Eval] = elements
 
@@ -107,6 +302,8 @@ class ElementList(Eval):
 
 
 class Object(Eval):
+    __slots__ = ('description',)
+
     def __init__(self) -> None:
         super().__init__()
         self.description:Optional[str] = None
@@ -124,24 +321,95 @@ class Object(Eval):
 
 
 class Array(Eval):
-    def __init__(self, elements:List[Eval]) -> None:
-        self.evaluated = False
-        self.elements:List[Cell] = [Cell(elm) for elm in elements]
+    __slots__ = ('evaluated', 'elements', 'shared')
+
+    def __init__(self, elements:Any, evaluated:bool=False, shared:bool=False) -> None:
+        self.evaluated = evaluated
+        # The expressions of the elements until the array's evaluated, and then their values, unboxed or packed
+        self.elements:Any = elements
+        # Whether the elements are shared with something else, and have to be copied before they're changed
+        self.shared = shared
 
     def __repr__(self) -> str:
-        return '[ %s ]' % (', '.join('%s' % repr(elm) for elm in self.elements))
+        return '[ %s ]' % (', '.join('%s' % repr(wrapValue(elm)) for elm in self.elements))
 
     def toJson(self) -> str:
-        return '[ %s ]' % (', '.join('%s' % dereference(elm).toJson() for elm in self.elements))
+        return '[ %s ]' % (', '.join('%s' % wrapValue(elm).toJson() for elm in self.elements))
 
     @staticmethod
     def fromPython(lst:list) -> Eval:
-        array = Array([wrap(elm) for elm in lst])
-        array.evaluated = True
-        return array
+        packed = pack(lst)
+
+        if packed is not None:
+            return Array(packed, True)
+
+        return Array(lst, True, True)
+
+    # An array of the values a whole-array operation worked out, packed if they can be
+    @staticmethod
+    def ofValues(values:List[Any]) -> 'Array':
+        packed = pack(values)
+        return Array(values if packed is None else packed, True)
+
+    # An element, boxed. A list or dict from Python is made an array or object, kept in its place.
+    def read(self, index:int) -> Eval:
+        value = self.elements[index]
+
+        if type(value) in PythonContainers:
+            value = self.own()[index] = wrap(value)
+
+        return wrapValue(value)
+
+    def write(self, index:int, value:Any) -> None:
+        elements = self.own()
+
+        # Packed elements stay packed while they're changed to numbers of the same kind
+        if type(elements) is Numbers:
+            if type(value) is PackedTypes[elements.typecode]:
+                try:
+                    elements[index] = value
+                    return
+                except OverflowError:
+                    pass
+            elements = self.elements = elements.tolist()
+
+        elements[index] = value
+
+    # The elements, to change, copied first if they're shared
+    def own(self) -> Any:
+        if self.shared:
+            self.elements = self.elements[:]
+            self.shared = False
+
+        return self.elements
+
+    # Another array of the same elements. They're shared by both, until either changes them.
+    def share(self) -> 'Array':
+        self.shared = True
+        return Array(self.elements, True, True)
+
+    # The elements as numbers, kept packed if they can be, or None if any isn't one
+    def numbers(self) -> Optional[Sequence[Union[int, float]]]:
+        if type(self.elements) is Numbers:
+            return self.elements
+
+        values = numberValues(self.elements)
+        if values is None:
+            return None
+
+        packed = pack(values)
+        if packed is None:
+            return values
+
+        self.elements = packed
+        self.shared = False
+        return packed
 
     def toPython(self) -> Any:
-        return [elm.toPython() for elm in self.elements]
+        if type(self.elements) is Numbers:
+            return self.elements.tolist()
+
+        return [elm.toPython() if isinstance(elm, Eval) else elm for elm in self.elements]
 
     @staticmethod
     def parse(_:LBracket, elements:ElementList, __:RBracket|None=None) -> Eval:
@@ -152,30 +420,64 @@ class Array(Eval):
 
     def isType(self, typeDesc:str) -> bool:
         return super().isType(typeDesc) or typeDesc.startswith('array') \
-            or typeDesc.startswith('collection')
+            or typeDesc.startswith('collection') or typeDesc == 'numeric'
 
     def evaluate(self, environment:Environment) -> Union[Eval, Cell]:
         if self.evaluated:
             return self
         
-        elements = \
-            [ dereference(elm.value.evaluate(environment))
-              for elm in self.elements
-            ]
-        array = Array(elements)
-        array.evaluated = True
+        return Array([unbox(elm.evaluate(environment)) for elm in self.elements], True)
+
+    def compile(self, scope:Optional[Scope]=None, tail:bool=False) -> Compiled:
+        if self.evaluated:
+            return super().compile(scope)
+
+        elements = [elm.compile(scope) for elm in self.elements]
+
+        def array(environment:Environment) -> Union[Eval, Cell]:
+            return Array([unbox(elm(environment)) for elm in elements], True)
+
+        constant = self.constant(scope)
 
-        return array
+        if constant is None:
+            return array
 
+        # Every array an array of constants makes shares the one list of them
+        values, guards = constant
+        packed = pack(values)
+        shared = values if packed is None else packed
+
+        def constantArray(environment:Environment) -> Union[Eval, Cell]:
+            return Array(shared, True, True)
+
+        return guarded(guards, constantArray, array)
+
+    # The elements as the list of their values, if they're all constants (see constantOf)
+    def constant(self, scope:Optional[Scope]) -> Optional[Tuple[List[Any], Dict[str, Guard]]]:
+        values:List[Any] = []
+        guards:Dict[str, Guard] = {}
+
+        for elm in self.elements:
+            constant = constantOf(elm, scope)
+
+            if constant is None:
+                return None
+
+            values.append(constant[0])
+            guards.update(constant[1])
+
+        return (values, guards)
 
     def get(self, index:int, environment:Environment) -> Union[Eval, Cell]:
         if index < 0 or index >= len(self.elements):
             environment.error('No element at index %s' % index)
 
-        return self.elements[index]
+        return Element(self, index)
 
 
 class ParamList(Eval):
+    __slots__ = ('params',)
+
     def __init__(self, params:List[str]) -> None:
         self.params:List[str] = params
 
@@ -198,6 +500,11 @@ class ParamList(Eval):
 
 
 class Function(Object):
+    __slots__ = ()
+
+    # Whether the function's parameters are always the same, so a call site can keep them
+    fixedSignature = False
+
     def get(self, name:str, environment:Environment) -> Union[Eval, Cell]:
         result:Eval = self
         if name == 'parameters':
@@ -222,6 +529,10 @@ class Function(Object):
 
 
 class Builtin(Function):
+    __slots__ = ('name', 'func', 'params')
+
+    fixedSignature = True
+
     def __init__(self,
             name:str,
             func:Callable[[Environment, Dict[str, Union[Eval, Cell]]], Union[Eval, Cell]],
@@ -244,12 +555,18 @@ class Builtin(Function):
 
 
 class Closure(Function):
+    __slots__ = ('params', 'expression', 'environment', 'evaluated', 'body')
+
+    fixedSignature = True
+
     def __init__(self, params:List[str], expr:Eval) -> None:
         super().__init__()
         self.params:List[str] = params
         self.expression:Eval = expr
         self.environment:Optional[Environment] = None
         self.evaluated = False
+        # The compiled expression, once the closure's been compiled or called
+        self.body:Optional[Compiled] = None
 
     def __repr__(self) -> str:
         return '\\ %s . %s' % \
@@ -274,21 +591,108 @@ class Closure(Function):
             self.evaluated = True
         return self
 
+    def compile(self, scope:Optional[Scope]=None, tail:bool=False) -> Compiled:
+        self.body = self.expression.compile(Scope(self.params, scope), True)
+        return self.evaluate
+
     def parameters(self, environment:Environment) -> Dict[str, str]:
         return { param: 'any' for param in self.params }
 
     def call(self, _:Environment, args:Dict[str,Union[Eval, Cell]]) -> Union[Eval, Cell]:
-        if self.environment is None:
-            _.error('Function not evaluated!')
-        environment = Environment(self.environment)
+        closure = self
+
+        while True:
+            if closure.environment is None:
+                _.error('Function not evaluated!')
+
+            if closure.body is None:
+                # Without the scope it was compiled in, only its own parameters can be looked up by slot
+                closure.body = closure.expression.compile(Scope(closure.params, None), True)
+
+            result = closure.body(Frame(closure.environment, closure.params, args))
+
+            # A closure that ends by calling another returns the call, to be made here
+            if not isinstance(result, TailCall):
+                return result
+
+            closure = result.closure
+            args = result.args
+
+
+# A call to a closure, from the end of another, that's waiting for Closure.call to make it
+class TailCall(Eval):
+    __slots__ = ('closure', 'args')
+
+    def __init__(self, closure:Closure, args:Dict[str,Union[Eval, Cell]]) -> None:
+        self.closure = closure
+        self.args = args
+
 
-        for param in self.params:
-            environment.setVariable(param, args[param])
+# The argument for a lazy parameter, which evaluates its expression the first time it's called
+class Thunk(Function):
+    __slots__ = ('expression', 'compiled', 'environment', 'value')
 
-        return self.expression.evaluate(environment)
+    fixedSignature = True
+
+    def __init__(self, expression:Eval, compiled:Optional[Compiled], environment:Optional[Environment]) -> None:
+        super().__init__()
+        self.expression = expression
+        # Until it's evaluated, what evaluates it and where
+        self.compiled = compiled
+        self.environment = environment
+        self.value:Union[Eval, Cell] = expression
+
+    def __repr__(self) -> str:
+        return '\\ . %s' % repr(self.expression)
+
+    # A thunk for an argument that's already been evaluated
+    @staticmethod
+    def of(value:Union[Eval, Cell]) -> 'Thunk':
+        thunk = Thunk(dereference(value), None, None)
+        thunk.value = value
+        return thunk
+
+    # The argument, evaluated, whether it's a thunk or not
+    @staticmethod
+    def force(value:Union[Eval, Cell]) -> Union[Eval, Cell]:
+        return value.call(value.environment, {}) if isinstance(value, Thunk) else value #type:ignore
+
+    def call(self, environment:Environment, args:Dict[str,Union[Eval, Cell]]) -> Union[Eval, Cell]:
+        if self.compiled is not None:
+            self.value = self.compiled(cast(Environment, self.environment))
+            self.compiled = None
+            self.environment = None
+
+        return self.value
+
+
+# An operator whose right side is a lazy parameter, made by defOperator
+class LazyOperator(Function):
+    __slots__ = ('func',)
+
+    fixedSignature = True
+
+    def __init__(self, func:Function) -> None:
+        super().__init__()
+        self.func = func
+
+    def __repr__(self) -> str:
+        return repr(self.func)
+
+    def parameters(self, environment:Environment) -> Dict[str, str]:
+        return {**self.func.parameters(environment), 'right': 'lazy'}
+
+    def call(self, environment:Environment, args:Dict[str,Union[Eval, Cell]]) -> Union[Eval, Cell]:
+        # Called other than as an operator, the right side is already evaluated
+        if not isinstance(args['right'], Thunk):
+            args = {**args, 'right': Thunk.of(args['right'])}
+
+        return self.func.call(environment, args)
 
 
 class ServiceCall(Function):
+    __slots__ = ('service', 'name')
+
     def __init__(self, service:str, call:str) -> None:
         super().__init__()
         self.service:str = service
@@ -342,6 +746,8 @@ class ServiceCall(Function):
 
 
 class Block(Eval):
+    __slots__ = ('expressions',)
+
     def __init__(self, exprs:List[Eval]) -> None:
         self.expressions = exprs
 
@@ -353,7 +759,7 @@ class Block(Eval):
         exprs:List[Eval] = []
 
         if isinstance(left, Block):
-            exprs = left.expressions
+            exprs = list(left.expressions)
         else:
             exprs.append(left)
 
@@ -367,8 +773,21 @@ class Block(Eval):
 
         return result
 
+    def compile(self, scope:Optional[Scope]=None, tail:bool=False) -> Compiled:
+        exprs = [expr.compile(scope) for expr in self.expressions[:-1]]
+        last = self.expressions[-1].compile(scope, tail)
+
+        def block(environment:Environment) -> Union[Eval, Cell]:
+            for expr in exprs:
+                expr(environment)
+            return last(environment)
+
+        return block
+
 
 class Arg(Eval):
+    __slots__ = ('args',)
+
     def __init__(self, param:str, arg:Eval) -> None:
         self.args:Dict[str,Eval] = {param: arg}
 
@@ -381,6 +800,8 @@ class Arg(Eval):
 
 
 class ArgList(Eval):
+    __slots__ = ('args',)
+
     def __init__(self, args:Dict[str,Eval]) -> None:
         self.args:Dict[str,Eval] = args
 
@@ -398,6 +819,8 @@ class ArgList(Eval):
 
 
 class ServiceObject(Object):
+    __slots__ = ('name', 'calls', 'methods')
+
     def __init__(self, name:str) -> None:
         super().__init__()
         self.name:str = name
@@ -450,17 +873,98 @@ class ServiceObject(Object):
         return list(self.calls.keys()) + list(self.methods.keys())
 
 
+# The keys of a kind of object, and the slot each one's value is in, shared by objects with the same keys
+class Shape:
+    __slots__ = ('keys', 'slots')
+
+    def __init__(self, keys:Tuple[str, ...]) -> None:
+        self.keys = keys
+        self.slots:Dict[str, int] = {key: slot for slot, key in enumerate(keys)}
+
+    # The shape shared by objects with these keys
+    @staticmethod
+    def of(keys:Tuple[str, ...]) -> 'Shape':
+        shape = shapes.get(keys)
+
+        if shape is None:
+            shape = Shape(tuple(sys.intern(key) if type(key) is str else key for key in keys))
+            # Past this many, new shapes aren't kept
+            if len(shapes) < MaxShapes:
+                shapes[shape.keys] = shape
+
+        return shape
+
+
+shapes:Dict[Tuple[str, ...], Shape] = {}
+MaxShapes = 4096
+
+
+# An object's properties, kept as its shape and the values in its slots, but used like the dict of them
+class Record(MutableMapping[str, Any]):
+    __slots__ = ('shape', 'contents')
+
+    def __init__(self, shape:Shape, contents:List[Any]) -> None:
+        self.shape = shape
+        # The value in each of the shape's slots
+        self.contents = contents
+
+    # A record of the properties of a dict, or a copy of another record
+    @staticmethod
+    def of(dct:Mapping[str, Any]) -> 'Record':
+        if type(dct) is Record:
+            return Record(dct.shape, list(dct.contents))
+
+        return Record(Shape.of(tuple(dct)), list(dct.values()))
+
+    def __getitem__(self, key:str) -> Any:
+        return self.contents[self.shape.slots[key]]
+
+    def __setitem__(self, key:str, value:Any) -> None:
+        slot = self.shape.slots.get(key)
+
+        if slot is None:
+            self.shape = Shape.of(self.shape.keys + (key,))
+            self.contents.append(value)
+        else:
+            self.contents[slot] = value
+
+    def __delitem__(self, key:str) -> None:
+        slot = self.shape.slots[key]
+        self.shape = Shape.of(self.shape.keys[:slot] + self.shape.keys[slot + 1:])
+        del self.contents[slot]
+
+    def __contains__(self, key:object) -> bool:
+        return key in self.shape.slots
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.shape.keys)
+
+    def __len__(self) -> int:
+        return len(self.contents)
+
+    # Quicker than looking up each key's slot, like Mapping's would
+    def items(self) -> Iterator[Tuple[str, Any]]: #type:ignore
+        return zip(self.shape.keys, self.contents)
+
+    def values(self) -> Iterator[Any]: #type:ignore
+        return iter(self.contents)
+
+
 class DictObject(Object):
-    def __init__(self, props:Dict[str, Eval]) -> None:
+    __slots__ = ('evaluated', '_properties', 'shared')
+
+    def __init__(self, props:MutableMapping[str, Any], evaluated:bool=False, shared:bool=False) -> None:
         super().__init__()
-        self.evaluated = False
-        self._properties:Dict[str, Cell] = \
-            { prop: Cell(value)
-              for prop, value in props.items()
-            }
+        self.evaluated = evaluated
+        # The expressions of the properties until the object's evaluated, and then their values, unboxed
+        self._properties:MutableMapping[str, Any] = props
+        # Whether the properties are a dict from Python, that something else might have too (see Array)
+        self.shared = shared
 
     def __repr__(self) -> str:
-        return '{ %s}' % ', '.join('%s: %s\n' % (prop, repr(value)) for prop, value in self._properties.items())
+        return '{ %s}' % ', '.join(
+            '%s: %s\n' % (prop, repr(wrapValue(value)))
+            for prop, value in self._properties.items())
 
 
     def __str__(self) -> str:
@@ -469,7 +973,7 @@ class DictObject(Object):
 
     def toJson(self) -> str:
         return '{ %s}' % ', '.join(
-            '"%s": %s\n' % (prop, dereference(value).toJson())
+            '"%s": %s\n' % (prop, wrapValue(value).toJson())
             for prop, value in self._properties.items())
 
 
@@ -484,17 +988,34 @@ class DictObject(Object):
 
     @staticmethod
     def fromPython(dct:dict) -> Eval:
-        obj = DictObject(
-            { prop: wrap(value)
-              for prop, value in dct.items()
-            })
-        obj.evaluated = True
+        return DictObject(dct, True, True)
+
+    def read(self, name:str) -> Eval:
+        value = self._properties[name]
+
+        if type(value) in PythonContainers:
+            value = self.own()[name] = wrap(value)
+
+        return wrapValue(value)
+
+    def write(self, name:str, value:Any) -> None:
+        self.own()[name] = value
+
+    def own(self) -> MutableMapping[str, Any]:
+        if self.shared:
+            self._properties = Record.of(self._properties)
+            self.shared = False
 
-        return obj
+        return self._properties
+
+    # Another object of the same properties. They're shared by both, until either changes them.
+    def share(self) -> 'DictObject':
+        self.shared = True
+        return DictObject(self._properties, True, True)
 
     def toPython(self) -> Any:
         return \
-            { prop: value.toPython()
+            { prop: value.toPython() if isinstance(value, Eval) else value
               for prop, value
               in self._properties.items()
             }
@@ -503,17 +1024,57 @@ class DictObject(Object):
         if self.evaluated:
             return self
 
-        obj = DictObject(
-            { prop: dereference(value.value.evaluate(environment))
-              for prop, value in self._properties.items()
-            })
-        obj.evaluated = True
-        return obj
+        return DictObject(
+            Record(
+                Shape.of(tuple(self._properties)),
+                [unbox(value.evaluate(environment)) for value in self._properties.values()]),
+            True)
+
+    def compile(self, scope:Optional[Scope]=None, tail:bool=False) -> Compiled:
+        if self.evaluated:
+            return super().compile(scope)
+
+        # Every object the expression makes has the same keys
+        shape = Shape.of(tuple(self._properties))
+        values = [value.compile(scope) for value in self._properties.values()]
+
+        def dictObject(environment:Environment) -> Union[Eval, Cell]:
+            return DictObject(Record(shape, [unbox(value(environment)) for value in values]), True)
+
+        constant = self.constant(scope)
+
+        if constant is None:
+            return dictObject
+
+        # Like an array of constants, every object an object of constants makes shares the one record of them
+        properties, guards = constant
+        shared = Record(shape, list(properties.values()))
+
+        def constantObject(environment:Environment) -> Union[Eval, Cell]:
+            return DictObject(shared, True, True)
+
+        return guarded(guards, constantObject, dictObject)
+
+    # The properties as the dict of their values, if they're all constants (see constantOf)
+    def constant(self, scope:Optional[Scope]) -> Optional[Tuple[Dict[str, Any], Dict[str, Guard]]]:
+        properties:Dict[str, Any] = {}
+        guards:Dict[str, Guard] = {}
+
+        for prop, value in self._properties.items():
+            constant = constantOf(value, scope)
+
+            if constant is None:
+                return None
+
+            properties[prop] = constant[0]
+            guards.update(constant[1])
+
+        return (properties, guards)
 
     def get(self, name:str, environment:Environment) -> Union[Eval, Cell]:
         if name not in self._properties:
             environment.error(f'Object has no property \'{name}\'')
-        return self._properties[name]
+        return Element(self, name)
 
     @property
     def properties(self) -> List[str]:
@@ -521,6 +1082,8 @@ class DictObject(Object):
 
 
 class ObjectRef(Eval):
+    __slots__ = ('obj', 'referent')
+
     def __init__(self, obj:Eval, referent:str) -> None:
         self.obj:Eval = obj
         self.referent:str = referent
@@ -544,8 +1107,23 @@ class ObjectRef(Eval):
         
         return cast(Object, obj).get(self.referent, environment)
 
+    def compile(self, scope:Optional[Scope]=None, tail:bool=False) -> Compiled:
+        getObj = self.obj.compile(scope)
+        referent = self.referent
+
+        def objectRef(environment:Environment) -> Union[Eval, Cell]:
+            obj = dereference(getObj(environment))
+            if not isinstance(obj, Object):
+                environment.error('%s is not an object' % str(obj))
+
+            return obj.get(referent, environment)
+
+        return objectRef
+
 
 class Define(Eval):
+    __slots__ = ('name',)
+
     def __init__(self, name:str) -> None:
         self.name = name
 
@@ -561,11 +1139,13 @@ class Define(Eval):
         return Define(var.name)
 
     def evaluate(self, environment:Environment) -> Union[Eval, Cell]:
-        environment.setVariable(self.name, Null())
+        environment.setVariable(self.name, NullValue)
         return environment.getVariable(self.name)
 
 
 class Constant(Eval):
+    __slots__ = ()
+
     def getValue(self) -> Any:
         return None
 
@@ -575,8 +1155,13 @@ class Constant(Eval):
     def equal(self, other:Eval) -> bool:
         return isinstance(other, self.__class__) and self.getValue() == cast(Constant, other).getValue()
 
+    def fold(self, scope:Optional[Scope]=None) -> Optional[Tuple['Constant', Dict[str, Guard]]]:
+        return (self, {})
+
 
 class Null(Constant):
+    __slots__ = ()
+
     def __init__(self) -> None:
         pass
 
@@ -588,6 +1173,8 @@ class Null(Constant):
 
 
 class String(Constant):
+    __slots__ = ('value',)
+
     def __init__(self, string:str) -> None:
         self.value = string
 
@@ -603,6 +1190,11 @@ class String(Constant):
         debug('          JSON ', value[0:120])
         return '"'+value+'"'
 
+    # The string, shared if it's empty
+    @staticmethod
+    def of(string:str) -> 'String':
+        return String(string) if string else EmptyString
+
     @staticmethod
     def parse(string:Str) -> Eval:
         debug('PARSING STRING: %s' % string)
@@ -618,24 +1210,34 @@ class String(Constant):
 
 
 class Integer(Constant):
+    __slots__ = ('value',)
+
     def __init__(self, integer:int) -> None:
         self.value = integer
 
     def __repr__(self) -> str:
         return str(self.value)
 
+    # The integer, shared if it's a small one
+    @staticmethod
+    def of(integer:int) -> 'Integer':
+        cached = SmallIntegers.get(integer)
+        return cached if cached is not None else Integer(integer)
+
     @staticmethod
     def parse(integer:Int) -> Eval:
-        return Integer(int(integer.text))
+        return Integer.of(int(integer.text))
 
     def getValue(self) -> Any:
         return self.value
 
     def isType(self, typeDesc:str) -> bool:
-        return super().isType(typeDesc) or typeDesc in ('integer', 'number')
+        return super().isType(typeDesc) or typeDesc in ('integer', 'number', 'numeric')
 
 
 class Float(Constant):
+    __slots__ = ('value',)
+
     def __init__(self, number:float) -> None:
         self.value = number
 
@@ -650,10 +1252,12 @@ class Float(Constant):
         return self.value
 
     def isType(self, typeDesc:str) -> bool:
-        return super().isType(typeDesc) or typeDesc in ('float', 'number')
+        return super().isType(typeDesc) or typeDesc in ('float', 'number', 'numeric')
 
 
 class Boolean(Constant):
+    __slots__ = ('value',)
+
     def __init__(self, boolean:bool) -> None:
         self.value = boolean
 
@@ -663,29 +1267,56 @@ class Boolean(Constant):
     def getValue(self) -> Any:
         return self.value
 
+    @staticmethod
+    def of(boolean:bool) -> 'Boolean':
+        return TrueValue if boolean else FalseValue
+
     @staticmethod
     def truthy(value:Union[Eval,Cell]) -> 'Boolean':
         expr = dereference(value)
-        result = Boolean(False)
 
         if isinstance(expr, Boolean):
-            result = expr
+            return expr
+        else:
+            return Boolean.of(Boolean.isTrue(expr))
+
+    # Like truthy, but without making a Boolean of the answer
+    @staticmethod
+    def isTrue(value:Union[Eval,Cell]) -> Any:
+        expr = dereference(value)
+
+        if isinstance(expr, Boolean):
+            return expr.value
         elif isinstance(expr, Integer):
-            result = Boolean(expr.getValue() != 0)
+            return expr.value != 0
         elif isinstance(expr, Float):
-            result = Boolean(expr.getValue() != 0.0)
+            return expr.value != 0.0
         elif isinstance(expr, Array):
-            result = Boolean(len(expr.elements) != 0)
+            return len(expr.elements) != 0
         else:
-            result = Boolean(not isinstance(expr, Null))
-
-        return result
+            return not isinstance(expr, Null)
 
     def isType(self, typeDesc:str) -> bool:
         return super().isType(typeDesc) or typeDesc == 'boolean'
 
 
+# Constants are never changed, so null, true, false, small integers and the empty string are shared
+NullValue = Null()
+TrueValue = Boolean(True)
+FalseValue = Boolean(False)
+EmptyString = String('')
+SmallIntegers:Dict[int, Integer] = {integer: Integer(integer) for integer in range(-128, 1025)}
+
+# The constants arrays and objects keep as the Python values they wrap
+Unboxed = (String, Integer, Float, Boolean)
+
+# The Python values arrays and objects made from Python can have, that are made arrays and objects when they're read
+PythonContainers = (list, dict)
+
+
 class IfThen(Eval):
+    __slots__ = ('ifp', 'thendo', 'elsedo')
+
     def __init__(self, ifp:Eval, thendo:Eval, elsedo:Eval) -> None:
         super().__init__()
         self.ifp = ifp
@@ -707,8 +1338,32 @@ class IfThen(Eval):
 
         return result
 
+    def compile(self, scope:Optional[Scope]=None, tail:bool=False) -> Compiled:
+        ifp = self.ifp.compile(scope)
+        thendo = self.thendo.compile(scope, tail)
+        elsedo = self.elsedo.compile(scope, tail)
+
+        def ifThen(environment:Environment) -> Union[Eval, Cell]:
+            if Boolean.isTrue(ifp(environment)):
+                return thendo(environment)
+            else:
+                return elsedo(environment)
+
+        folded = self.ifp.fold(scope)
+
+        if folded is None:
+            return ifThen
+
+        # The branch that won't be taken is dropped, unless a guard on the condition fails
+        value, guards = folded
+        branch = thendo if Boolean.isTrue(value) else elsedo
+
+        return guarded(guards, branch, ifThen) if guards else branch
+
 
 class Assignment(Eval):
+    __slots__ = ('lvalue', 'rvalue')
+
     def __init__(self, lvalue:Eval, rvalue:Eval) -> None:
         self.lvalue = lvalue
         self.rvalue = rvalue
@@ -730,8 +1385,22 @@ class Assignment(Eval):
         cell.set(value)
         return value
 
+    def compile(self, scope:Optional[Scope]=None, tail:bool=False) -> Compiled:
+        lvalue = self.lvalue.compile(scope)
+        rvalue = self.rvalue.compile(scope)
+
+        def assignment(environment:Environment) -> Union[Eval, Cell]:
+            cell = cast(Cell, lvalue(environment))
+            value = rvalue(environment)
+            cell.set(value)
+            return value
+
+        return assignment
+
 
 class Import(Eval):
+    __slots__ = ('name',)
+
     def __init__(self, name:str) -> None:
         self.name = name
 
@@ -748,7 +1417,7 @@ class Import(Eval):
 
     def evaluate(self, environment:Environment) -> Union[Eval, Cell]:
         filename = self.name.replace('.', '/') + '.yaml'
-        service:Eval = Null()
+        service:Eval = NullValue
 
         try:
             service = ServiceObject(self.name)
@@ -768,6 +1437,8 @@ class Import(Eval):
 
 
 class Describe(Eval):
+    __slots__ = ('what',)
+
     def __init__(self, what:Eval|None=None) -> None:
         self.what = what
 
@@ -794,6 +1465,8 @@ class Describe(Eval):
 
 
 class Exit(Eval):
+    __slots__ = ()
+
     def __repr__(self) -> str:
         return 'exit'
 
@@ -811,6 +1484,8 @@ class Exit(Eval):
 
 
 class TryException(Eval):
+    __slots__ = ('expr',)
+
     def __init__(self, expr:Eval) -> None:
         self.expr = expr
 
@@ -825,12 +1500,25 @@ class TryException(Eval):
         try:
             result = self.expr.evaluate(environment)
         except EvaluationError:
-            result = Null()
+            result = NullValue
 
         return result
 
+    def compile(self, scope:Optional[Scope]=None, tail:bool=False) -> Compiled:
+        expr = self.expr.compile(scope)
+
+        def tryException(environment:Environment) -> Union[Eval, Cell]:
+            try:
+                return expr(environment)
+            except EvaluationError:
+                return NullValue
+
+        return tryException
+
 
 class Call(Eval):
+    __slots__ = ('func', 'args')
+
     def __init__(self, func:Eval, args:Dict[str,Eval]) -> None:
         self.func:Eval = func
         self.args:Dict[str,Eval] = args
@@ -860,51 +1548,165 @@ class Call(Eval):
             }
         func = dereference(self.func.evaluate(environment))
 
-        if not isinstance(func, Function):
-            environment.error('%s is not a function' % func)
+        return CallSite().invoke(environment, func, args)
 
-        params = cast(Function, func).parameters(environment)
+    def compile(self, scope:Optional[Scope]=None, tail:bool=False) -> Compiled:
+        args = [(key, arg.compile(scope)) for key, arg in self.args.items()]
+        getFunc = self.func.compile(scope)
+        site = CallSite()
+        invoke = site.tailInvoke if tail else site.invoke
 
-        for param in params:
-            ptype = params[param]
-            optional = ptype[0] == '?'
+        # Calls with two arguments or fewer build them directly
+        if not args:
+            def call0(environment:Environment) -> Union[Eval, Cell]:
+                return invoke(environment, dereference(getFunc(environment)), {})
+            return call0
 
-            if optional:
-                ptype = ptype[1:]
+        if len(args) == 1:
+            (key, arg), = args
 
+            def call1(environment:Environment) -> Union[Eval, Cell]:
+                evaluated = {key: arg(environment)}
+                return invoke(environment, dereference(getFunc(environment)), evaluated)
+            return call1
+
+        if len(args) == 2:
+            (key1, arg1), (key2, arg2) = args
+
+            def call2(environment:Environment) -> Union[Eval, Cell]:
+                evaluated = {key1: arg1(environment), key2: arg2(environment)}
+                return invoke(environment, dereference(getFunc(environment)), evaluated)
+            return call2
+
+        def call(environment:Environment) -> Union[Eval, Cell]:
+            evaluated = {key: arg(environment) for key, arg in args}
+            return invoke(environment, dereference(getFunc(environment)), evaluated)
+
+        return call
+
+
+# A function's parameters, worked out once into what each argument needs to be checked for
+class Signature:
+    __slots__ = ('params', 'lazy')
+
+    def __init__(self, params:Dict[str, str]) -> None:
+        # Each parameter, its type, whether it's optional or a cell, and the classes known to be its type or not
+        self.params:List[Tuple[str, str, bool, bool, Dict[type, bool]]] = \
+            [ (param, ptype.lstrip('?'), ptype[0] == '?', ptype == 'cell', {})
+              for param, ptype in params.items()
+            ]
+        # The parameters that get their arguments unevaluated
+        self.lazy = frozenset(param for param, ptype in params.items() if ptype.lstrip('?') == 'lazy')
+
+    def check(self, environment:Environment, args:Dict[str,Union[Eval, Cell]]) -> None:
+        for param, ptype, optional, isCell, known in self.params:
             if param not in args:
                 if not optional:
                     environment.error('Missing argument: `%s` should be %s' % \
                         ( param
-                        , describe.article(params[param])
+                        , describe.article(ptype)
                         ))
+                continue
 
-            if params[param] == 'cell':
-                if not isinstance(args[param], Cell):
+            arg = args[param]
+
+            if isCell:
+                if not isinstance(arg, Cell):
                     environment.error('Parameter `%s` should be a variable or other cell not %s, %s' % \
                         ( param
-                        , args[param]
+                        , arg
                         , describe.article(
-                            describe.typeName(args[param]))
+                            describe.typeName(arg))
                         ))
-                    
-            elif param in args and not dereference(args[param]).isType(ptype):
-                environment.error('Parameter `%s` should be %s not %s, %s' % \
-                    ( param
-                    , describe.article(ptype)
-                    , repr(args[param])
-                    , describe.article(
-                        describe.typeName(args[param]))
-                    ))
+                continue
+
+            if ptype in Unchecked:
+                continue
+
+            # Whether a value is a type only depends on its class
+            value = dereference(arg)
+            valueType = type(value)
+            matches = known.get(valueType)
+            if matches is None:
+                matches = known[valueType] = value.isType(ptype)
+
+            if not matches:
+                typeError(environment, param, ptype, arg)
+
+
+# The parameter types any argument is
+Unchecked = ('any', 'lazy')
+
+
+def typeError(environment:Environment, param:str, ptype:str, arg:Union[Eval, Cell]) -> NoReturn:
+    environment.error('Parameter `%s` should be %s not %s, %s' % \
+        ( param
+        , describe.article(ptype)
+        , repr(arg)
+        , describe.article(
+            describe.typeName(arg))
+        ))
+
+
+# Where a function is called from, which keeps the signature of the function it last called
+class CallSite:
+    __slots__ = ('function', 'signature')
+
+    def __init__(self) -> None:
+        self.function:Optional[Function] = None
+        self.signature = Signature({})
+
+    # Checks the arguments against the function's parameters and calls it
+    def invoke(self, environment:Environment, func:Eval, args:Dict[str,Union[Eval, Cell]]) -> Union[Eval, Cell]:
+        function = self.check(environment, func, args)
 
         try:
             terminal.setForeground(environment.output, 'yellow')
-            return cast(Function, func).call(environment, args)
+            return function.call(environment, args)
         finally:
             terminal.reset(environment.output)
 
+    # Like invoke, but a closure isn't called, it's returned as a TailCall for the closure this call ends to make
+    def tailInvoke(self, environment:Environment, func:Eval, args:Dict[str,Union[Eval, Cell]]) -> Union[Eval, Cell]:
+        function = self.check(environment, func, args)
+
+        if isinstance(function, Closure):
+            return TailCall(function, args)
+
+        try:
+            terminal.setForeground(environment.output, 'yellow')
+            return function.call(environment, args)
+        finally:
+            terminal.reset(environment.output)
+
+    # Checks the arguments against the function's parameters, and returns the function
+    def check(self, environment:Environment, func:Eval, args:Dict[str,Union[Eval, Cell]]) -> Function:
+        if func is self.function:
+            self.signature.check(environment, args)
+        else:
+            self.signatureOf(environment, func).check(environment, args)
+
+        return func #type:ignore
+
+    def signatureOf(self, environment:Environment, func:Eval) -> Signature:
+        if func is self.function:
+            return self.signature
+
+        if not isinstance(func, Function):
+            environment.error('%s is not a function' % func)
+
+        signature = Signature(func.parameters(environment))
+        # A service call's parameters are whatever the service says they are now, so its signature isn't kept
+        if func.fixedSignature:
+            self.function = func
+            self.signature = signature
+
+        return signature
+
 
 class OpCall(Call):
+    __slots__ = ('op', 'left', 'right')
+
     def __init__(self, op:Eval, left:Eval, right:Eval) -> None:
         super().__init__(
             op, 
@@ -927,8 +1729,238 @@ class OpCall(Call):
     def parse(left:Eval, op:Eval, right:Eval) -> Eval: #type:ignore
         return OpCall(op, left, right)
 
+    # The operator decides whether the right side is evaluated or given to it as a thunk
+    def evaluate(self, environment:Environment) -> Union[Eval, Cell]:
+        left = self.left.evaluate(environment)
+        op = dereference(self.op.evaluate(environment))
+        site = CallSite()
+
+        if 'right' in site.signatureOf(environment, op).lazy:
+            right:Union[Eval, Cell] = Thunk(self.right, self.right.evaluate, environment)
+        else:
+            right = self.right.evaluate(environment)
+
+        return site.invoke(environment, op, {'left': left, 'right': right})
+
+    def compile(self, scope:Optional[Scope]=None, tail:bool=False) -> Compiled:
+        unfolded = self.compileOperator(scope, tail)
+        folded = self.fold(scope)
+
+        if folded is None:
+            return unfolded
+
+        value, guards = folded
+
+        return guarded(guards, value.evaluate, unfolded)
+
+    def compileOperator(self, scope:Optional[Scope], tail:bool) -> Compiled:
+        getLeft = self.left.compile(scope)
+        getRight = self.right.compile(scope)
+        getOp = self.op.compile(scope)
+        site = CallSite()
+        invoke = site.tailInvoke if tail else site.invoke
+        rightSide = self.right
+
+        def call(environment:Environment, op:Eval, left:Union[Eval, Cell]) -> Union[Eval, Cell]:
+            if 'right' in site.signatureOf(environment, op).lazy:
+                right:Union[Eval, Cell] = Thunk(rightSide, getRight, environment)
+            else:
+                right = getRight(environment)
+
+            return invoke(environment, op, {'left': left, 'right': right})
+
+        name = self.op.name if isinstance(self.op, Variable) else None
+
+        if name in shortCircuits:
+            return OpCall.compileShortCircuit(shortCircuits[name], (getLeft, getRight, getOp), call, invoke)
+        if name in builtinOperators:
+            return OpCall.compileBuiltin(builtinOperators[name], (getLeft, getRight, getOp), call, invoke)
+
+        def opCall(environment:Environment) -> Union[Eval, Cell]:
+            left = getLeft(environment)
+            return call(environment, dereference(getOp(environment)), left)
+
+        return opCall
+
+    # A builtin operator on constants of the types it takes is worked out here rather than called
+    @staticmethod
+    def compileBuiltin(
+            operator:BuiltinOperator,
+            sides:Tuple[Compiled, Compiled, Compiled],
+            call:Callable[[Environment, Eval, Union[Eval, Cell]], Union[Eval, Cell]],
+            invoke:Callable[[Environment, Eval, Dict[str,Union[Eval, Cell]]], Union[Eval, Cell]]) -> Compiled:
+        run, (leftType, rightType), func, retwrap = operator
+        getLeft, getRight, getOp = sides
+        leftTypes = constantTypes(leftType)
+        rightTypes = constantTypes(rightType)
+        result = retwrap or wrapValue
+        # The operator's builtin, once it's been seen to be
+        builtin:Optional[Eval] = None
+
+        def builtinOperator(environment:Environment) -> Union[Eval, Cell]:
+            nonlocal builtin
+
+            left = getLeft(environment)
+            op = dereference(getOp(environment))
+
+            if op is not builtin:
+                if not isinstance(op, Builtin) or op.func is not run:
+                    return call(environment, op, left)
+                builtin = op
+
+            right = getRight(environment)
+            leftValue = dereference(left)
+            rightValue = dereference(right)
+
+            if type(leftValue) in leftTypes and type(rightValue) in rightTypes:
+                try:
+                    return result(func(leftValue.value, rightValue.value)) #type:ignore
+                except Exception: #pylint: disable=broad-exception-caught
+                    # Calling the builtin reports the error
+                    pass
+
+            return invoke(environment, op, {'left': left, 'right': right})
+
+        return builtinOperator
+
+    # A builtin short circuiting operator with a boolean left side is decided here
+    @staticmethod
+    def compileShortCircuit(
+            operator:Tuple[Callable[..., Any], bool],
+            sides:Tuple[Compiled, Compiled, Compiled],
+            call:Callable[[Environment, Eval, Union[Eval, Cell]], Union[Eval, Cell]],
+            invoke:Callable[[Environment, Eval, Dict[str,Union[Eval, Cell]]], Union[Eval, Cell]]) -> Compiled:
+        run, decides = operator
+        getLeft, getRight, getOp = sides
+        builtin:Optional[Eval] = None
+
+        def shortCircuit(environment:Environment) -> Union[Eval, Cell]:
+            nonlocal builtin
+
+            left = getLeft(environment)
+            op = dereference(getOp(environment))
+
+            if op is not builtin:
+                if not isinstance(op, Builtin) or op.func is not run:
+                    return call(environment, op, left)
+                builtin = op
+
+            leftValue = dereference(left)
+
+            if type(leftValue) is not Boolean:
+                return call(environment, op, left)
+            if leftValue.value == decides: #type:ignore
+                return leftValue
+
+            right = getRight(environment)
+            rightValue = dereference(right)
+
+            if type(rightValue) is not Boolean:
+                return invoke(environment, op, {'left': left, 'right': right})
+
+            return rightValue
+
+        return shortCircuit
+
+    def fold(self, scope:Optional[Scope]=None) -> Optional[Tuple['Constant', Dict[str, Guard]]]:
+        if not isinstance(self.op, Variable) or self.op.name not in builtinOperators:
+            return None
+
+        left = self.left.fold(scope)
+        right = self.right.fold(scope)
+
+        if left is None or right is None:
+            return None
+
+        run, (leftType, rightType), func, retwrap = builtinOperators[self.op.name]
+        (leftValue, leftGuards), (rightValue, rightGuards) = left, right
+
+        # Anything that would be an error is left for the call to report when it's evaluated
+        if not leftValue.isType(leftType) or not rightValue.isType(rightType):
+            return None
+
+        try:
+            value = (retwrap or wrap)(func(leftValue.getValue(), rightValue.getValue()))
+        except Exception: #pylint: disable=broad-exception-caught
+            return None
+
+        if not isinstance(value, Constant):
+            return None
+
+        getOp = self.op.compile(scope)
+
+        def isBuiltin(environment:Environment) -> bool:
+            op = dereference(getOp(environment))
+            return isinstance(op, Builtin) and op.func is run
+
+        return (value, {**leftGuards, **rightGuards, self.op.name: isBuiltin})
+
+
+# The operators whose builtins work on the values of their sides, by name: the builtin's function, the types of its
+# sides, the function of their values (which raises rather than reporting an error), and what wraps its result
+builtinOperators:Dict[str, BuiltinOperator] = {}
+
+# The operators that only evaluate their right side if their left doesn't decide them, by name: the builtin's function,
+# and the value of the left side that decides it
+shortCircuits:Dict[str, Tuple[Callable[..., Any], bool]] = {}
+
+# The Python class of the numbers packed with each typecode
+PackedTypes:Dict[str, type] = {'q': int, 'd': float}
+NumberTypes = (int, float)
+
+
+# Values packed as Numbers, if they're all integers that fit in 64 bits or all floats
+def pack(values:Any) -> Optional[Numbers]:
+    if all(type(value) is int for value in values):
+        try:
+            return Numbers('q', values)
+        except OverflowError:
+            return None
+    elif all(type(value) is float for value in values):
+        return Numbers('d', values)
+    else:
+        return None
+
+
+# The values of elements that are all numbers, boxed or not, or None if any isn't a number
+def numberValues(elements:Any) -> Optional[List[Union[int, float]]]:
+    if all(type(element) in NumberTypes for element in elements):
+        return elements
+
+    values = [unbox(element) for element in elements]
+    return values if all(type(value) in NumberTypes for value in values) else None
+
+
+# The classes of the values wrap most often makes, by the class of the value it's given
+Wrappers:Dict[type, Callable[[Any], Eval]] = \
+    { str: String.of
+    , bool: Boolean.of
+    , int: Integer.of
+    , float: Float
+    }
+
+
+def wrapValue(value:Any) -> Eval:
+    wrapper = Wrappers.get(type(value))
+    return wrapper(value) if wrapper is not None else wrap(value)
+
+
+# The classes of constant that are of a type
+def constantTypes(typeDesc:str) -> Tuple[type, ...]:
+    constants:List[Constant] = [NullValue, EmptyString, Integer.of(0), Float(0.0), FalseValue]
+    return tuple(type(constant) for constant in constants if constant.isType(typeDesc))
+
+# The variables the base environment defines as constants
+ConstantVariables:Dict[str, Constant] = \
+    { 'true': TrueValue
+    , 'false': FalseValue
+    , 'null': NullValue
+    }
+
 
 class Subscript(Eval):
+    __slots__ = ('array', 'subscript')
+
     def __init__(self, array:Eval, sub:Eval) -> None:
         self.array = array
         self.subscript = sub
@@ -952,8 +1984,29 @@ class Subscript(Eval):
 
         return cast(Array, array).get(subValue, environment)
 
+    def compile(self, scope:Optional[Scope]=None, tail:bool=False) -> Compiled:
+        getArray = self.array.compile(scope)
+        getSub = self.subscript.compile(scope)
+
+        def subscript(environment:Environment) -> Union[Eval, Cell]:
+            array = dereference(getArray(environment))
+
+            if not isinstance(array, Array):
+                environment.error('%s is not subscriptable' % array)
+
+            sub = dereference(getSub(environment))
+
+            if not isinstance(sub, Integer):
+                environment.error('%s cannot be used as a subscript' % sub)
+
+            return array.get(sub.value, environment)
+
+        return subscript
+
 
 class Group(Eval):
+    __slots__ = ('value',)
+
     def __init__(self, value:Eval) -> None:
         self.value = value
 
@@ -967,8 +2020,16 @@ class Group(Eval):
     def evaluate(self, environment:Environment) -> Union[Eval, Cell]:
         return self.value.evaluate(environment)
 
+    def compile(self, scope:Optional[Scope]=None, tail:bool=False) -> Compiled:
+        return self.value.compile(scope, tail)
+
+    def fold(self, scope:Optional[Scope]=None) -> Optional[Tuple['Constant', Dict[str, Guard]]]:
+        return self.value.fold(scope)
+
 
 class Not(Eval):
+    __slots__ = ('value',)
+
     def __init__(self, value:Eval) -> None:
         self.value = value
 
@@ -982,5 +2043,18 @@ class Not(Eval):
         if not isinstance(value, Boolean):
             environment.error('%s is not a boolean' % value)
 
-        return Boolean(not cast(Boolean, value).getValue())
+        return Boolean.of(not cast(Boolean, value).getValue())
+
+    def compile(self, scope:Optional[Scope]=None, tail:bool=False) -> Compiled:
+        getValue = self.value.compile(scope)
+
+        def negate(environment:Environment) -> Union[Eval, Cell]:
+            value = dereference(getValue(environment))
+
+            if not isinstance(value, Boolean):
+                environment.error('%s is not a boolean' % value)
+
+            return Boolean.of(not value.value)
+
+        return negate
 
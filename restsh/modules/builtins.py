@@ -1,15 +1,14 @@
 from typing import cast, Union, Dict, Callable, Tuple, List, Optional, Any
-import io
 import os
-import sys
 import re
 import json
 import base64
 from ..environment import Environment, Cell, EvaluationError
-from ..evaluate import dereference, wrap, Eval, Builtin, Array, Function, ServiceObject, Object, String, Boolean \
-    , Integer, Float, Null, Constant
+from ..evaluate import dereference, wrap, wrapValue, unbox, typeError, Eval, Builtin, Array, Function, ServiceObject \
+    , Object, String, Boolean, Integer, Float, Constant, LazyOperator, NullValue
 from ..token import tokens, Op
-from ..repl import repLoop
+from ..parser import precedence
+from ..repl import runScript, runFile
 
 builtins:Dict[
         str,
@@ -79,9 +78,7 @@ def bEval(environment:Environment, args:Dict[str,Eval]) -> Union[Eval, Cell]:
     if not isinstance(value, String):
         environment.error('Cannot eval non-string: %s' % value)
 
-    env.input = io.StringIO(initial_value=cast(String, value).getValue())
-
-    return repLoop(env)
+    return runScript(env, cast(String, value).getValue())
 
 
 @add('type', {'of': 'any'}, 'Get the type of a value')
@@ -104,32 +101,33 @@ def bType(environment:Environment, args:Dict[str,Eval]) -> Union[Eval, Cell]:
 def bMap(environment:Environment, args:Dict[str,Eval]) -> Union[Eval, Cell]:
     array = cast(Array, args['arr'])
     func = cast(Function, args['fn'])
-    result:List[Eval] = []
-    index = 0
+    result:List[Any] = []
 
-    for expr in array.elements:
-        elm = func.call(environment, {'item': dereference(expr), 'index': wrap(index)})
-        result.append(dereference(elm))
-        index += 1
+    for index in range(len(array.elements)):
+        elm = func.call(environment, {'item': array.read(index), 'index': wrap(index)})
+        result.append(unbox(elm))
 
-    return Array(result)
+    return Array(result, True)
 
 
 @add('filter', {'arr': 'array', 'fn': 'function[item,index]'})
 def bFilter(environment:Environment, args:Dict[str,Eval]) -> Union[Eval, Cell]:
     array = cast(Array, args['arr'])
     func = cast(Function, args['fn'])
-    result:List[Eval] = []
-    index = 0
+    result:List[Any] = []
 
-    for expr in array.elements:
-        keep = func.call(environment, {'item': dereference(expr), 'index': wrap(index)})
+    for index in range(len(array.elements)):
+        item = array.read(index)
+        keep = func.call(environment, {'item': item, 'index': wrap(index)})
         
         if Boolean.truthy(keep).getValue():
-            result.append(dereference(expr))
-        index += 1
+            result.append(unbox(item))
+
+    # Keeping every element keeps the array, as another one sharing its elements
+    if len(result) == len(array.elements):
+        return array.share()
 
-    return Array(result)
+    return Array(result, True)
 
 
 @add('reduce', {'arr': 'array', 'fn': 'function[accum,item,index]'}, 'Reduce left-to-right')
@@ -137,17 +135,14 @@ def bReduce(environment:Environment, args:Dict[str,Eval]) -> Union[Eval, Cell]:
     array = cast(Array, args['arr'])
     func = cast(Function, args['fn'])
     accum:Union[Eval,Cell] = args['base']
-    index = 0
 
-    for item in array.elements:
+    for index in range(len(array.elements)):
         accum = func.call(
             environment,
             { 'accum': dereference(accum)
-            , 'item': dereference(item)
+            , 'item': array.read(index)
             , 'index': wrap(index)
             })
-
-        index += 1
     
     return accum
 
@@ -157,21 +152,30 @@ def bRreduce(environment:Environment, args:Dict[str,Eval]) -> Union[Eval, Cell]:
     array = cast(Array, args['arr'])
     func = cast(Function, args['fn'])
     accum:Union[Eval,Cell] = args['base']
-    index = 0
+    last = len(array.elements) - 1
 
-    for item in reversed(array.elements):
+    for index in range(last + 1):
         accum = func.call(
             environment,
             { 'accum': dereference(accum)
-            , 'item': dereference(item)
+            , 'item': array.read(last - index)
             , 'index': wrap(index)
             })
-
-        index += 1
     
     return accum
 
 
+@add('sum', {'arr': 'array[number]'}, 'Add up the numbers in an array')
+def bSum(environment:Environment, args:Dict[str,Eval]) -> Union[Eval, Cell]:
+    array = cast(Array, args['arr'])
+    numbers = array.numbers()
+
+    if numbers is None:
+        typeError(environment, 'arr', 'array[number]', array)
+
+    return wrap(sum(numbers))
+
+
 @add('do', {'fn': 'function[]'}, 'Call a function until it returns false')
 def bDo(environment:Environment, args:Dict[str,Eval]) -> Union[Eval, Cell]:
     func = cast(Function, args['fn'])
@@ -182,7 +186,7 @@ def bDo(environment:Environment, args:Dict[str,Eval]) -> Union[Eval, Cell]:
         if not result.toPython():
             break
 
-    return Null()
+    return NullValue
 
 
 @add('string', {'value': 'any'}, 'Convert a value into a string')
@@ -213,15 +217,15 @@ def bInteger(environment:Environment, args:Dict[str,Eval]) -> Union[Eval, Cell]:
         return value
     elif isinstance(value, String):
         try:
-            return Integer(int(cast(String, value).getValue()))
+            return Integer.of(int(cast(String, value).getValue()))
         except: #pylint: disable=bare-except
-            return Integer(0)
+            return Integer.of(0)
     elif isinstance(value, Boolean):
-        return Integer(int(cast(Boolean, value).getValue()))
+        return Integer.of(int(cast(Boolean, value).getValue()))
     elif isinstance(value, Float):
-        return Integer(int(cast(Float, value).getValue()))
+        return Integer.of(int(cast(Float, value).getValue()))
     else:
-        return Integer(0)
+        return Integer.of(0)
 
 
 @add('sh', {'cmd': 'string'})
@@ -234,7 +238,7 @@ def bSh(environment:Environment, args:Dict[str,Eval]) -> Union[Eval, Cell]:
         return String(output.read())
     except Exception as ex:
         environment.error(str(ex))
-        return Null()
+        return NullValue
 
 
 @add('grep', {'text': 'string', 'for': 'string', 'case': '?boolean'}, 'Search text for a regular expression')
@@ -247,7 +251,7 @@ def bGrep(environment:Environment, args:Dict[str,Eval]) -> Union[Eval, Cell]:
     if caseIns is None or cast(Boolean, caseIns).getValue() is False:
         regexargs = { 'flags': re.IGNORECASE }
 
-    return Boolean(re.search(forStr, text, **regexargs) is not None)
+    return Boolean.of(re.search(forStr, text, **regexargs) is not None)
 
 
 @add('split', {'text': 'string', 'on': 'string'}, 'Split a string on a regular expression')
@@ -255,7 +259,7 @@ def bSplit(environment:Environment, args:Dict[str,Eval]) -> Union[Eval, Cell]:
     text = cast(String, args['text']).getValue()
     onStr = cast(String, args['on']).getValue()
 
-    return Array([String(string) for string in re.split(onStr, text)])
+    return Array(re.split(onStr, text), True)
 
 
 @add('join', {'with': 'string', 'arr': 'array'}, 'Join the elements of an array into a string')
@@ -263,7 +267,7 @@ def bJoin(environment:Environment, args:Dict[str,Eval]) -> Union[Eval, Cell]:
     text = cast(String, args['with']).getValue()
     array = cast(Array, args['arr']).elements
 
-    return wrap(text.join([str(elm) for elm in array]))
+    return wrap(text.join([str(wrapValue(elm)) for elm in array]))
 
 
 @add('tojson', {'val': 'any'}, 'Convert ')
@@ -323,17 +327,17 @@ builtins['set'] = (bSet, {'var': 'any', 'value': 'any'}, 'Set or define a variab
 def bSource(environment:Environment, args:Dict[str,Eval]) -> Union[Eval, Cell]:
     filename = cast(String, args['file']).getValue()
 
-    with open(os.path.expanduser(filename), 'r', encoding='utf-8') as rsource:
-        environment.input = rsource
-        try:
-            repLoop(environment)
-            return environment.lastResult
-        finally:
-            environment.input = sys.stdin
-            environment.loop = True
+    try:
+        return runFile(environment, os.path.expanduser(filename))
+    finally:
+        environment.loop = True
 
 
-@add('defOperator', {'sym': 'string', 'func': 'function'}, 'Define a new operator')
+@add(
+    'defOperator',
+    {'sym': 'string', 'func': 'function', 'precedence': '?integer', 'lazy': '?boolean'},
+    'Define a new operator. Operators with a higher precedence bind more tightly; + is 5 and * is 6. A lazy operator\'s'
+    ' function is given its right side unevaluated, as a function to call if it needs it.')
 def bDefOperator(environment:Environment, args:Dict[str,Eval]) -> Any:
     opre = next(regex for token, regex in tokens if token == Op)
     chars = opre.pattern[1:-2]
@@ -346,6 +350,12 @@ def bDefOperator(environment:Environment, args:Dict[str,Eval]) -> Any:
     if 'left' not in params or 'right' not in params:
         environment.error('Operator functions must take two parameters: \'left\' and \'right\'')
 
+    if 'precedence' in args:
+        precedence[sym] = cast(Integer, args['precedence']).getValue()
+
+    if 'lazy' in args and cast(Boolean, args['lazy']).getValue():
+        func = LazyOperator(func)
+
     environment.setVariable(sym, func)
 
     return sym
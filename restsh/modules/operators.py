@@ -1,6 +1,9 @@
 from typing import cast, Union, Dict, Callable, Tuple, Optional, Any
+from itertools import repeat
+import operator
 from ..environment import Environment, Cell, EvaluationError
-from ..evaluate import wrap, dereference, Eval, Builtin, Boolean, Constant
+from ..evaluate import wrap, dereference, typeError, Eval, Builtin, Boolean, Constant, Thunk, Array \
+    , builtinOperators, shortCircuits
 
 operators:Dict[
         str,
@@ -11,14 +14,18 @@ operators:Dict[
         ] = { }
 
 
+# An operator on the values of its sides, and element by element on arrays of numbers if it's elementwise
 def add(name:str, args:Tuple[str,str], retwrap:Optional[Callable[[Any], Union[Eval, Cell]]]=None
-        ) -> Any:
+        , elementwise:Optional[Callable[[Any, Any], Any]]=None) -> Any:
     def wrapper(func:Callable[[Any, Any], Any]
             ) -> Callable[[Environment, Dict[str,Union[Eval, Cell]]], Union[Eval, Cell]]:
         def run(environment:Environment, args:Dict[str,Union[Eval, Cell]]) -> Union[Eval, Cell]:
             left = dereference(args['left'])
             right = dereference(args['right'])
 
+            if elementwise and (isinstance(left, Array) or isinstance(right, Array)):
+                return applyElementwise(environment, elementwise, left, right)
+
             try:
                 result = func(cast(Constant, left).getValue(), cast(Constant, right).getValue())
 
@@ -33,60 +40,103 @@ def add(name:str, args:Tuple[str,str], retwrap:Optional[Callable[[Any], Union[Ev
                 return wrap(None)
 
         operators[name] = (run, args)
+        builtinOperators[name] = (run, args, func, retwrap)
 
         return run
 
     return wrapper
 
 
+# The numbers of a side of an element-wise operator: the elements of an array of them, or a number for every element
+def numbersOf(environment:Environment, param:str, value:Eval) -> Any:
+    if isinstance(value, Array):
+        numbers = value.numbers()
+
+        if numbers is None:
+            typeError(environment, param, 'array[number]', value)
+
+        return numbers
+    else:
+        return repeat(cast(Constant, value).getValue())
+
+
+# Applies an operator to each element of arrays of numbers, or of an array and a number
+def applyElementwise(environment:Environment, func:Callable[[Any, Any], Any], left:Eval, right:Eval) -> Eval:
+    if isinstance(left, Array) and isinstance(right, Array) and len(left.elements) != len(right.elements):
+        environment.error('Arrays of different sizes: %s and %s' % (len(left.elements), len(right.elements)))
+
+    leftNumbers = numbersOf(environment, 'left', left)
+    rightNumbers = numbersOf(environment, 'right', right)
+
+    try:
+        values = list(map(func, leftNumbers, rightNumbers))
+    except Exception as ex: #pylint: disable=broad-exception-caught
+        environment.error("%s: %s" % (ex.__class__.__name__, ' '.join(ex.args)))
+
+    return Array.ofValues(values)
+
+
 def bEqual(environment:Environment, args:Dict[str,Union[Cell, Eval]]) -> Union[Eval, Cell]:
-    return Boolean(dereference(args['left']).equal(dereference(args['right'])))
+    return Boolean.of(dereference(args['left']).equal(dereference(args['right'])))
 operators['=='] = (bEqual, ('any', 'any'))
 
 
 def bNotEqual(environment:Environment, args:Dict[str,Union[Cell, Eval]]) -> Union[Eval, Cell]:
-    return Boolean(not dereference(args['left']).equal(dereference(args['right'])))
+    return Boolean.of(not dereference(args['left']).equal(dereference(args['right'])))
 operators['~='] = (bEqual, ('any', 'any'))
 
 
-@add('+', ('number', 'number'))
+@add('+', ('numeric', 'numeric'), elementwise=operator.add)
 def bAdd(left:Union[int,float], right:Union[int,float]) -> Union[int,float]:
     return left + right
 
 
-@add('-', ('number', 'number'))
+@add('-', ('numeric', 'numeric'), elementwise=operator.sub)
 def bMinus(left:Union[int,float], right:Union[int,float]) -> Union[int,float]:
     return left - right
 
 
-@add('*', ('number', 'number'))
+@add('*', ('numeric', 'numeric'), elementwise=operator.mul)
 def bMultiply(left:Union[int,float], right:Union[int,float]) -> Union[int,float]:
     return left * right
 
 
-@add('/', ('number', 'number'))
+@add('/', ('numeric', 'numeric'), elementwise=operator.truediv)
 def bDivide(left:Union[int,float], right:Union[int,float]) -> Union[int,float]:
     return left / right
 
 
-@add('<', ('number', 'number'))
+@add('<', ('numeric', 'numeric'), elementwise=operator.lt)
 def bLessThan(left:Union[int,float], right:Union[int,float]) -> bool:
     return left < right
 
 
-@add('>', ('number', 'number'))
+@add('>', ('numeric', 'numeric'), elementwise=operator.gt)
 def bGreaterThan(left:Union[int,float], right:Union[int,float]) -> bool:
     return left > right
 
 
-@add('||', ('boolean', 'boolean'))
-def bOr(left:bool, right:bool) -> bool:
-    return left or right
+# An operator on booleans that only evaluates its right side if its left doesn't decide it
+def shortCircuit(name:str, decides:bool) -> None:
+    def run(environment:Environment, args:Dict[str,Union[Eval, Cell]]) -> Union[Eval, Cell]:
+        left = cast(Boolean, dereference(args['left']))
+
+        if left.getValue() == decides:
+            return left
+
+        right = Thunk.force(args['right'])
+
+        if not dereference(right).isType('boolean'):
+            typeError(environment, 'right', 'boolean', right)
+
+        return dereference(right)
+
+    operators[name] = (run, ('boolean', 'lazy'))
+    shortCircuits[name] = (run, decides)
 
 
-@add('&&', ('boolean', 'boolean'))
-def bAnd(left:bool, right:bool) -> bool:
-    return left and right
+shortCircuit('||', True)
+shortCircuit('&&', False)
 
 
 @add('|', ('string', 'string'))
@@ -2,8 +2,8 @@ from typing import Any
 import os
 import re
 from ..moduleUtils import builtin
-from ..evaluate import wrap, Eval, DictObject, ServiceObject, Builtin, Array
-from ..repl import repLoop
+from ..evaluate import wrap, wrapValue, Eval, DictObject, ServiceObject, Builtin, Array
+from ..repl import runFile
 
 def flattenable(value:Eval) -> bool:
     return not isinstance(value, (ServiceObject, Builtin))
@@ -12,10 +12,10 @@ def flatten(value:Eval) -> str:
     if isinstance(value, (Builtin, ServiceObject)):
         return value.name
     elif isinstance(value, Array):
-        elements = [flatten(elm.value) for elm in value.elements]
+        elements = [flatten(wrapValue(elm)) for elm in value.elements]
         return '[ %s ]' % ', '.join(elements)
     elif isinstance(value, DictObject):
-        kvps = {key: flatten(val.value) for key, val in value._properties.items()}
+        kvps = {key: flatten(wrapValue(val)) for key, val in value._properties.items()}
         return '{ %s }' % ', '.join(f'{key}: {val}' for key, val in kvps.items())
     elif isinstance(value, str):
         return value.toJson()
@@ -62,18 +62,14 @@ def bSave(environment, args):
 def bOpen(environment, args):
     name = args['name'].toPython()
     filename = environment.homedir+name+'.sess'
-    originalInput = environment.input
 
     sessionObj.get('current', environment).set(wrap(name))
 
     try:
-        with open(filename) as file:
-            environment.input = file
-            repLoop(environment)
+        runFile(environment, filename)
     except:
         pass
 
-    environment.input = originalInput
     environment.loop = True
 
     return None
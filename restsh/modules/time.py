@@ -6,6 +6,8 @@ from ..environment import Environment, Cell
 from ..evaluate import dereference, wrap, DictObject, Builtin, String, Constant, Eval
 
 class Time(Constant):
+    __slots__ = ('time',)
+
     def __init__(self, time:datetime) -> None:
         super().__init__()
         self.time = time
@@ -0,0 +1,465 @@
+from typing import cast, List, Tuple, Type, Union, Any, Optional, Dict, Set, Callable
+from .token import Token, Op
+from .evaluate import Eval
+from .debug import debug
+from .parser import Production, OperatorProduction, ParseError, PartialParseError, Rule, getPrecedence, statement
+
+# An LALR(1) parser for the grammar in parser.py. Shift/reduce conflicts go to the shift, except between operators,
+# which are decided by precedence while parsing.
+
+Symbol = Union[Production, Type[Token]]
+
+SHIFT = 0
+REDUCE = 1
+ACCEPT = 2
+PRECEDENCE = 3
+
+# (SHIFT, state), (REDUCE, rule), (ACCEPT, 0), or (PRECEDENCE, state) to either shift to the state or reduce the
+# current state's operator rule, depending on the precedence of the operators involved
+Action = Tuple[int, int]
+# The end of the tokens has no token type, so it's None in the tables
+Terminal = Optional[Type[Token]]
+Item = Tuple[int, int]
+
+
+class LRRule:
+    def __init__(self,
+            lhs:Production,
+            rhs:List[Symbol],
+            build:Callable[..., Eval],
+            operator:bool=False
+            ) -> None:
+        self.lhs = lhs
+        self.rhs = rhs
+        self.build = build
+        self.operator = operator
+        # Whether the rule continues from an interim result of any type, like an ObjectRef does
+        self.continues = False
+        # For each position in the rule, whether a token before it leaves the parse open
+        self.open:List[bool] = [
+            any(isinstance(sym, type) and issubclass(sym, Token) and sym.openParse for sym in rhs[:dot])
+            for dot in range(len(rhs) + 1)
+            ]
+
+    def rebase(self, lhs:Production) -> 'LRRule':
+        rebased = LRRule(lhs, [cast(Symbol, lhs)] + self.rhs[1:], self.build, self.operator)
+        rebased.continues = True
+        return rebased
+
+    # The rule, starting with the rest of a rule that continued the start of this one from an interim result
+    def following(self, lhs:Production, inner:'LRRule') -> 'LRRule':
+        count = len(inner.rhs)
+
+        def build(*values:Any) -> Eval:
+            return self.build(inner.build(*values[:count]), *values[count:])
+
+        return LRRule(lhs, [cast(Symbol, lhs)] + inner.rhs[1:] + self.rhs[1:], build)
+
+    def __repr__(self) -> str:
+        return '%s -> %s' % (self.lhs.name, ' '.join(
+            sym.name if isinstance(sym, Production) else sym.__name__
+            for sym in self.rhs))
+
+
+def passThrough(value:Eval) -> Eval:
+    return value
+
+
+class Grammar:
+    def __init__(self, start:Production) -> None:
+        self.productions:List[Production] = []
+        self.accept = Production(start, name='*accept')
+        self.rules:List[LRRule] = []
+
+        self.collect(self.accept)
+
+        for production in self.productions:
+            if self.continues(production):
+                continue
+
+            for rule in production.rules:
+                if isinstance(rule, Production) and self.continues(rule):
+                    self.rules.extend(self.translate(production, inner, rule) for inner in rule.rules)
+                else:
+                    self.rules.append(self.translate(production, rule, production))
+
+        # A statement that isn't an expression (like an import) can still be continued by those rules
+        for lrRule in [lrRule.rebase(start) for lrRule in self.rules if lrRule.continues]:
+            if not any(other.lhs == lrRule.lhs and other.rhs == lrRule.rhs for other in self.rules):
+                self.rules.append(lrRule)
+
+        # So can the production a rule starts with, like the reference of an assignment (`let x.y = 1`)
+        for lrRule in list(self.rules):
+            leading = lrRule.rhs[0]
+            if lrRule.continues or len(lrRule.rhs) < 2 or not isinstance(leading, Production):
+                continue
+
+            for inner in list(self.rules):
+                if inner.continues and inner.lhs == leading:
+                    self.rules.append(lrRule.following(start, inner))
+
+        self.nonterminals:Set[Production] = set(self.productions)
+        self.byLhs:Dict[Production, List[int]] = {production: [] for production in self.productions}
+
+        for index, lrRule in enumerate(self.rules):
+            self.byLhs[lrRule.lhs].append(index)
+
+        self.first:Dict[Symbol, Set[Type[Token]]] = self.firstSets()
+
+
+    def collect(self, start:Production) -> None:
+        pending = [start]
+
+        while pending:
+            production = pending.pop(0)
+            if production in self.productions:
+                continue
+            self.productions.append(production)
+
+            for rule in production.rules:
+                if isinstance(rule, Production):
+                    pending.append(rule)
+                else:
+                    pending.extend(pat for pat in rule[1] if isinstance(pat, Production))
+
+
+    # Whether every rule of a production continues from an interim result, like an ObjectRef does
+    @staticmethod
+    def continues(production:Production) -> bool:
+        return all(not isinstance(rule, Production) and rule[1][0] is Eval for rule in production.rules)
+
+
+    # A rule of the production, or of one it continues (source)
+    def translate(self, production:Production, rule:Union[Production, Rule], source:Production) -> LRRule:
+        if isinstance(rule, Production):
+            return LRRule(production, [rule], passThrough)
+
+        cls, pats = rule
+        rhs:List[Symbol] = []
+
+        for index, pat in enumerate(pats):
+            if isinstance(pat, Production) or issubclass(cast(type, pat), Token):
+                rhs.append(cast(Symbol, pat))
+            elif index == 0:
+                # Left recursion, like an ElementList's, or a continuation
+                rhs.append(production)
+            else:
+                raise ValueError('Cannot translate %s in %s' % (pat, production))
+
+        # An operator's right operand can be anything its left can be, precedence sorts out the rest
+        if isinstance(source, OperatorProduction):
+            lrRule = LRRule(production, [rhs[0], rhs[1], rhs[0]], cls.parse, True) #type:ignore
+        else:
+            lrRule = LRRule(production, rhs, cls.parse) #type:ignore
+
+        lrRule.continues = pats[0] is Eval
+        return lrRule
+
+
+    def firstSets(self) -> Dict[Symbol, Set[Type[Token]]]:
+        # There are no empty rules, so FIRST of a rule is just FIRST of its first symbol
+        first:Dict[Symbol, Set[Type[Token]]] = {production: set() for production in self.productions}
+        changed = True
+
+        while changed:
+            changed = False
+
+            for lrRule in self.rules:
+                leading = lrRule.rhs[0]
+                adding = first[leading] if isinstance(leading, Production) else {leading}
+
+                if not adding <= first[lrRule.lhs]:
+                    first[lrRule.lhs] |= adding
+                    changed = True
+
+        return first
+
+
+    def firstOf(self, symbols:List[Symbol], lookahead:Terminal) -> Set[Terminal]:
+        if not symbols:
+            return {lookahead}
+        leading = symbols[0]
+        return set(self.first[leading]) if isinstance(leading, Production) else {leading}
+
+
+# Marks the lookaheads a kernel item passes along to the items it leads to, while the tables are being built
+class Propagate(Token):
+    pass
+
+
+class ParseTables:
+    def __init__(self, grammar:Grammar) -> None:
+        self.grammar = grammar
+        self.rules = grammar.rules
+        self.kernels:List[List[Item]] = []
+        self.transitions:List[Dict[Symbol, int]] = []
+        self.actions:List[Dict[Terminal, Action]] = []
+        self.gotos:List[Dict[Production, int]] = []
+        # The operator rule to reduce in each state with a PRECEDENCE action
+        self.operatorRules:Dict[int, int] = {}
+        self.conflicts:List[str] = []
+
+        self.buildStates()
+        lookaheads = self.buildLookaheads()
+        self.buildActions(lookaheads)
+
+
+    def closure(self, kernel:List[Item]) -> List[Item]:
+        items = list(kernel)
+        added = set(items)
+
+        for ruleIndex, dot in items:
+            rhs = self.rules[ruleIndex].rhs
+            if dot < len(rhs) and isinstance(rhs[dot], Production):
+                for index in self.grammar.byLhs[cast(Production, rhs[dot])]:
+                    if (index, 0) not in added:
+                        added.add((index, 0))
+                        items.append((index, 0))
+
+        return items
+
+
+    def buildStates(self) -> None:
+        # The LR(0) automaton
+        start = [(0, 0)]
+        states:Dict[Tuple[Item, ...], int] = {tuple(start): 0}
+        self.kernels.append(start)
+
+        for kernel in self.kernels:
+            moves:Dict[Symbol, List[Item]] = {}
+
+            for ruleIndex, dot in self.closure(kernel):
+                rhs = self.rules[ruleIndex].rhs
+                if dot < len(rhs):
+                    moves.setdefault(rhs[dot], []).append((ruleIndex, dot + 1))
+
+            transitions:Dict[Symbol, int] = {}
+
+            for symbol, items in moves.items():
+                key = tuple(sorted(items))
+                if key not in states:
+                    states[key] = len(self.kernels)
+                    self.kernels.append(sorted(items))
+                transitions[symbol] = states[key]
+
+            self.transitions.append(transitions)
+
+
+    def closureWithLookaheads(self, kernel:List[Tuple[Item, Terminal]]) -> Set[Tuple[Item, Terminal]]:
+        items = set(kernel)
+        pending = list(kernel)
+
+        while pending:
+            (ruleIndex, dot), lookahead = pending.pop()
+            rhs = self.rules[ruleIndex].rhs
+
+            if dot < len(rhs) and isinstance(rhs[dot], Production):
+                following = self.grammar.firstOf(rhs[dot+1:], lookahead)
+
+                for index in self.grammar.byLhs[cast(Production, rhs[dot])]:
+                    for terminal in following:
+                        entry = ((index, 0), terminal)
+                        if entry not in items:
+                            items.add(entry)
+                            pending.append(entry)
+
+        return items
+
+
+    def buildLookaheads(self) -> List[Dict[Item, Set[Terminal]]]:
+        # LALR(1) lookaheads for the kernel items, by propagation
+        propagate = cast(Terminal, Propagate)
+        lookaheads:List[Dict[Item, Set[Terminal]]] = [{item: set() for item in kernel} for kernel in self.kernels]
+        propagation:Dict[Tuple[int, Item], List[Tuple[int, Item]]] = {}
+
+        lookaheads[0][(0, 0)].add(None)
+
+        for state, kernel in enumerate(self.kernels):
+            for item in kernel:
+                for (ruleIndex, dot), lookahead in self.closureWithLookaheads([(item, propagate)]):
+                    rhs = self.rules[ruleIndex].rhs
+                    if dot == len(rhs):
+                        continue
+
+                    target = (self.transitions[state][rhs[dot]], (ruleIndex, dot + 1))
+
+                    if lookahead is propagate:
+                        propagation.setdefault((state, item), []).append(target)
+                    else:
+                        lookaheads[target[0]][target[1]].add(lookahead)
+
+        changed = True
+        while changed:
+            changed = False
+
+            for (state, item), targets in propagation.items():
+                for targetState, targetItem in targets:
+                    adding = lookaheads[state][item] - lookaheads[targetState][targetItem]
+                    if adding:
+                        lookaheads[targetState][targetItem] |= adding
+                        changed = True
+
+        return lookaheads
+
+
+    def buildActions(self, lookaheads:List[Dict[Item, Set[Terminal]]]) -> None:
+        for state, kernel in enumerate(self.kernels):
+            actions:Dict[Terminal, Action] = {}
+            gotos:Dict[Production, int] = {}
+
+            for symbol, target in self.transitions[state].items():
+                if isinstance(symbol, Production):
+                    gotos[symbol] = target
+                else:
+                    actions[symbol] = (SHIFT, target)
+
+            # With no empty rules, complete items are always kernel items
+            for item in kernel:
+                ruleIndex, dot = item
+                if dot < len(self.rules[ruleIndex].rhs):
+                    continue
+
+                for terminal in lookaheads[state][item]:
+                    action = (ACCEPT, 0) if ruleIndex == 0 else (REDUCE, ruleIndex)
+                    actions[terminal] = self.resolve(state, terminal, actions.get(terminal), action)
+
+            self.actions.append(actions)
+            self.gotos.append(gotos)
+
+
+    def resolve(self, state:int, terminal:Terminal, existing:Optional[Action], action:Action) -> Action:
+        if existing is None:
+            return action
+
+        rule = self.rules[action[1]]
+
+        if existing[0] == SHIFT:
+            if not rule.operator:
+                return existing
+            elif terminal is Op:
+                self.operatorRules[state] = action[1]
+                return (PRECEDENCE, existing[1])
+            else:
+                return action
+
+        # Reduce/reduce: the rule declared first wins, like the first alternative of a production would
+        self.conflicts.append('state %s on %s: %s vs %s' % (
+            state,
+            terminal.__name__ if terminal is not None else 'end',
+            self.rules[existing[1]],
+            rule))
+        return existing if existing[1] < action[1] else action
+
+
+    def expected(self, state:int) -> List[Type[Token]]:
+        return [terminal for terminal in self.actions[state] if terminal is not None]
+
+
+    def isPartial(self, states:List[int]) -> Optional[Production]:
+        # Out of tokens: whether any way of reducing the parse so far leaves a rule open (like an unmatched paren)
+        pending = [tuple(states)]
+        seen = set()
+
+        while pending:
+            stack = pending.pop()
+            if stack in seen:
+                continue
+            seen.add(stack)
+
+            for ruleIndex, dot in self.kernels[stack[-1]]:
+                rule = self.rules[ruleIndex]
+
+                if dot < len(rule.rhs):
+                    if rule.open[dot]:
+                        return rule.lhs
+                elif ruleIndex != 0:
+                    base = stack[:-len(rule.rhs)]
+                    target = self.gotos[base[-1]].get(rule.lhs)
+                    if target is not None:
+                        pending.append(base + (target,))
+
+        return None
+
+
+def operatorPrecedence(value:Any) -> int:
+    return getPrecedence(Op(value.name)) or 0
+
+
+# Generated the first time they're needed
+Tables:Optional[ParseTables] = None
+
+
+def getTables() -> ParseTables:
+    global Tables #pylint: disable=global-statement
+
+    if Tables is None:
+        Tables = ParseTables(Grammar(statement))
+        debug('parse tables: %s states, conflicts: %s' % (len(Tables.kernels), Tables.conflicts))
+
+    return Tables
+
+
+def parse(tokens:List[Token]) -> List[Eval]:
+    return IncrementalParser()(tokens)
+
+
+# Parses a statement read a line at a time, carrying on from the stacks saved after the last try's last shift
+class IncrementalParser:
+    def __init__(self) -> None:
+        # The tokens of the last try, unless it parsed (or failed before its last token), and the saved stacks
+        self.tokens:Tuple[Token, ...] = ()
+        self.states:List[int] = [0]
+        self.values:List[Any] = []
+
+    def __call__(self, tokens:List[Token]) -> List[Eval]:
+        if len(self.tokens) < len(tokens) and tuple(tokens[:len(self.tokens)]) == self.tokens:
+            states, values, pos = self.states, self.values, len(self.tokens)
+        else:
+            states, values, pos = [0], [], 0
+
+        self.tokens, self.states, self.values = (), [0], []
+
+        return self.parse(tokens, states, values, pos)
+
+    def parse(self, tokens:List[Token], states:List[int], values:List[Any], pos:int) -> List[Eval]:
+        tables = getTables()
+
+        while True:
+            token = tokens[pos] if pos < len(tokens) else None
+            action = tables.actions[states[-1]].get(type(token) if token is not None else None)
+
+            if action is None:
+                if token is None:
+                    inside = tables.isPartial(states)
+                    if inside is not None:
+                        raise PartialParseError(inside)
+                expected = cast(List[Union[Type[Token], Type[Eval]]], tables.expected(states[-1]))
+                raise ParseError(None, expected, False, token)
+
+            kind, target = action
+
+            # Reduce if the operator we've got binds at least as tightly as the next one, otherwise shift the next one
+            if kind == PRECEDENCE:
+                if operatorPrecedence(values[-2]) >= (getPrecedence(cast(Token, token)) or 0):
+                    kind, target = REDUCE, tables.operatorRules[states[-1]]
+                else:
+                    kind = SHIFT
+
+            if kind == SHIFT:
+                states.append(target)
+                values.append(token)
+                pos += 1
+
+                if pos == len(tokens):
+                    self.tokens, self.states, self.values = tuple(tokens), list(states), list(values)
+            elif kind == REDUCE:
+                rule = tables.rules[target]
+                count = len(rule.rhs)
+                value = rule.build(*values[-count:])
+                del values[-count:]
+                del states[-count:]
+                values.append(value)
+                states.append(tables.gotos[states[-1]][rule.lhs])
+            else:
+                self.tokens, self.states, self.values = (), [0], []
+                return [values[-1]]
@@ -1,10 +1,11 @@
-from typing import cast, List, Tuple, Type, Union, Any, Optional
+from typing import cast, List, Tuple, Type, Union, Any, Optional, Dict, FrozenSet, Set
 from .token import Token, Sym, Op, Eq, Dot, LParen, RParen, LBrace, RBrace, LBracket, RBracket \
     , Comma, Colon, SemiColon, Bang, BSlash \
     , If, Then, Else, Let, Imp, Help, Ext, Try, Str, Flt, Int
 from .evaluate import Eval, Variable, ObjectRef, Define, Float, Integer, String, Array, Assignment, Import \
     , Arg, ArgList, Call, OpCall, ElementList, DictObject, Subscript, Not, ParamList, Closure \
     , IfThen, Describe, Exit, TryException, Group, Block
+from .debug import debug
 
 class EndOfTokens(Exception):
     def __init__(self, inside:'Production') -> None:
@@ -16,12 +17,15 @@ class ParseError(Exception):
             inside:Optional['Production'],
             tokens:List[Union[Type[Token],
             Type[Eval]]],
-            endOfTokens:bool
+            endOfTokens:bool,
+            token:Optional[Token]=None
             ) -> None:
         super().__init__()
         self.inside = inside
         self.tokens = tokens
         self.endOfTokens = endOfTokens
+        # Where the parse went wrong, if it's known
+        self.token = token
 
 
 class PartialParseError(Exception):
@@ -31,13 +35,44 @@ class PartialParseError(Exception):
 
 
 Rule = Tuple[Type[Eval], List[Union['Production', Type[Token], Type[Eval]]]]
-ParseStack = List[Union[Eval, Token]]
+# The parsed value, the position of the first token after it, and whether we ran out of tokens along the way
+ParseResult = Tuple[Eval, int, bool]
+# Where a production's parse starts, and which rules are blocked by left recursion
+MemoKey = Tuple['Production', int, Optional[Eval], FrozenSet[Tuple['Production',int]]]
+# Each memo entry also has the furthest token position its parse looked at
+Memo = Dict[MemoKey, Tuple[Union[ParseResult, ParseError, EndOfTokens, PartialParseError], int]]
+
+
+# The tokens and memo shared by every production during one parse
+class ParseContext:
+    def __init__(self, tokens:List[Token]) -> None:
+        self.tokens:Tuple[Token, ...] = tuple(tokens)
+        self.memo:Memo = {}
+        # The furthest token position looked at, and the memo entries for parses that looked past the end
+        self.reach:int = -1
+        self.ended:List[MemoKey] = []
+        # How many rules were actually tried, and how many were skipped because of their FIRST sets
+        self.attempts:int = 0
+        self.pruned:int = 0
+
+    def peek(self, pos:int, head:Optional[Eval]) -> Union[Eval, Token, None]:
+        if head is not None:
+            return head
+        self.reach = max(self.reach, pos)
+        return self.tokens[pos] if pos < len(self.tokens) else None
+
+    # The furthest token looked at, which is where a failed parse went wrong
+    def furthest(self) -> Optional[Token]:
+        return self.tokens[self.reach] if 0 <= self.reach < len(self.tokens) else None
 
 
 class Production:
     def __init__(self, *rules:Union['Production', Rule], **kwargs) -> None:
         self.name:str = str(kwargs.get('name') or '') # TODO: random name
         self.rules:List[Union['Production', Rule]] = list(rules)
+        # The token and Eval types each rule can start with; filled in by computeFirstSets()
+        self.firstTokens:List[Set[Type[Token]]] = []
+        self.firstEvals:List[Tuple[Type[Eval], ...]] = []
 
 
     def __eq__(self, other:Any) -> bool:
@@ -52,20 +87,30 @@ class Production:
         self.rules = self.rules + list(rules)
 
 
+    def canStart(self, index:int, current:Union[Eval, Token]) -> bool:
+        if isinstance(current, Token):
+            return type(current) in self.firstTokens[index]
+        return isinstance(current, self.firstEvals[index])
+
+
     def parseRule(self,
             rule:Rule,
-            stack:ParseStack,
-            recursed:List[Tuple['Production',int]]
-            , offset:int
-            ) -> Tuple[Eval, ParseStack, bool]:
+            context:ParseContext,
+            pos:int,
+            head:Optional[Eval],
+            recursed:List[Tuple['Production',int]],
+            *, offset:int
+            ) -> ParseResult:
 
         eot = False
         parsed:List[Union[Eval, Token]] = []
         openParse = False
 
         for pat in rule[1]:
-            # If we have pattern left, and our token/Eval stack is empty, then we have a partial parse
-            if not stack:
+            current = context.peek(pos, head)
+
+            # If we have pattern left, and we're out of tokens/Evals, then we have a partial parse
+            if current is None:
                 #print(f' > EOT {self.name}: {pat}')
                 if openParse:
                     raise PartialParseError(self)
@@ -73,15 +118,19 @@ class Production:
                     raise EndOfTokens(self)
 
             if isinstance(pat, Production):
-                result, stack, endOfTokens = pat.parse(stack, recursed, offset+1)
+                result, pos, endOfTokens = pat.parse(context, pos, head, recursed, offset+1)
+                head = None
                 eot = eot or endOfTokens
 
-            elif isinstance(stack[0], cast(Type[Any], pat)):
+            elif isinstance(current, cast(Type[Any], pat)):
                 if issubclass(pat, Token):
                     openParse |= pat.openParse
 
-                result = stack[0]
-                stack = stack[1:]
+                result = current
+                if head is not None:
+                    head = None
+                else:
+                    pos += 1
                 recursed = []
             # This token/Eval doesn't match this part of the pattern
             else:
@@ -89,25 +138,41 @@ class Production:
 
             parsed.append(result)
 
-        return (rule[0].parse(*parsed), stack, eot) #type:ignore
+        return (rule[0].parse(*parsed), pos, eot) #type:ignore
 
 
-    def parseRight(self, stack:ParseStack, recursed:List[Tuple['Production',int]], offset:int
-            ) -> Tuple[Eval, ParseStack, bool]:
+    def parseRight(self,
+            context:ParseContext,
+            pos:int,
+            head:Optional[Eval],
+            recursed:List[Tuple['Production',int]],
+            offset:int
+            ) -> ParseResult:
         eot = False
         partial:PartialParseError|None = None
         error = []
-        longestMatch:Optional[Tuple[Eval, ParseStack, bool]] = None
+        expected:List[Union[Type[Token], Type[Eval]]] = []
+        longestMatch:Optional[ParseResult] = None
+        current = context.peek(pos, head)
 
         for rule, index in zip(self.rules, range(len(self.rules))):
             try:
                 if (self, index) in recursed:
                     continue
 
+                # Don't bother with rules that can't start with what's next; they could only fail
+                if current is not None and not self.canStart(index, current):
+                    context.pruned += 1
+                    expected.extend(self.firstTokens[index])
+                    expected.extend(self.firstEvals[index])
+                    continue
+
+                context.attempts += 1
+
                 if isinstance(rule, Production):
-                    match = rule.parse(stack, [(self, index), *recursed], offset+1)
+                    match = rule.parse(context, pos, head, [(self, index), *recursed], offset+1)
                 else:
-                    match = self.parseRule(rule, stack, [(self, index), *recursed], offset+1)
+                    match = self.parseRule(rule, context, pos, head, [(self, index), *recursed], offset=offset+1)
 
                 if match[2]:
                     eot = True
@@ -116,7 +181,7 @@ class Production:
                     #print(' '*offset, f'setting longest match: {match}')
                     longestMatch = match
                 # the longest match is the one that leaves the least tokens
-                elif len(longestMatch[1]) > len(match[1]):
+                elif longestMatch[1] < match[1]:
                     #print(' '*offset, f'updating longest match: {match}')
                     longestMatch = match
 
@@ -129,7 +194,7 @@ class Production:
                 #print('Setting EOT in', self.name)
                 eot = True
 
-        # If there is either no matching rule, or the matching rule leaves items on the stack
+        # If there is either no matching rule, or the matching rule leaves tokens unparsed
         if not longestMatch:
             # We had a partial match
             if partial is not None:
@@ -137,7 +202,7 @@ class Production:
 
             # Otherwise, collect our expected tokens for a parse error
 
-            tokens:List[Union[Type[Token], Type[Eval]]] = []
+            tokens:List[Union[Type[Token], Type[Eval]]] = expected
 
             for err in error:
                 tokens = tokens + err.tokens
@@ -145,17 +210,58 @@ class Production:
             raise ParseError(self, tokens, eot)
 
         # Our longest match leaves tokens/Evel left to parse
-        elif longestMatch[1] and partial is not None:
+        elif longestMatch[1] < len(context.tokens) and partial is not None:
             #print(" -> END OF TOKENS %s, %s" % (self.name, longestMatch))
             raise partial #pylint: disable=raising-bad-type
 
         #print(' '*offset, '-> lM %s' % (longestMatch,))
 
-        return cast(Tuple[Eval, ParseStack, bool], longestMatch)
+        return cast(ParseResult, longestMatch)
+
+
+    def parse(self,
+            context:ParseContext,
+            pos:int,
+            head:Optional[Eval],
+            recursed:List[Tuple['Production',int]],
+            offset:int
+            ) -> ParseResult:
+        key = (self, pos, head, frozenset(recursed))
+        memo = context.memo
 
+        if key in memo:
+            cached, reach = memo[key]
+            context.reach = max(context.reach, reach)
+            if isinstance(cached, Exception):
+                raise cached.with_traceback(None)
+            return cached
 
-    def parse(self, stack:ParseStack, recursed:List[Tuple['Production',int]], offset) -> Tuple[Eval, ParseStack, bool]:
-        fullResult:Tuple[Eval, ParseStack, bool]|None = None
+        outerReach = context.reach
+        context.reach = -1
+
+        try:
+            result = self.parseLoop(context, pos, head, recursed, offset)
+        except (ParseError, EndOfTokens, PartialParseError) as ex:
+            memo[key] = (ex, context.reach)
+            raise
+        else:
+            memo[key] = (result, context.reach)
+        finally:
+            if context.reach >= len(context.tokens):
+                context.ended.append(key)
+            context.reach = max(outerReach, context.reach)
+
+        return result
+
+
+    def parseLoop(self,
+            context:ParseContext,
+            pos:int,
+            head:Optional[Eval],
+            recursed:List[Tuple['Production',int]],
+            offset:int
+            ) -> ParseResult:
+        fullResult:ParseResult|None = None
 
         # This loop essentially implements a non-advancing transition, in the special case of left recursion (without a
         # start symbol).
@@ -163,21 +269,21 @@ class Production:
 
         #print(' '*offset, f'@ Trying {self.name}')
         try:
-            while stack:
-                #print('Parsing %s with stack %s' % (self, stack))
-                result, stack, endOfTokens = self.parseRight(stack, recursed, offset)
-                fullResult = (result, list(stack), endOfTokens)
+            while context.peek(pos, head) is not None:
+                #print('Parsing %s at %s with head %s' % (self, pos, head))
+                result, pos, endOfTokens = self.parseRight(context, pos, head, recursed, offset)
+                fullResult = (result, pos, endOfTokens)
                 #print('storing full result: ', fullResult)
 
-                if not endOfTokens:
-                    stack.insert(0, result)
-                #print('%s read interim result %s (%s); reparsing: %s' % (self, result, result.__class__, stack))
+                # Unless we ran out of tokens, the result becomes the head for another go-round
+                head = None if endOfTokens else result
+                #print('%s read interim result %s (%s); reparsing at: %s' % (self, result, result.__class__, pos))
         except EndOfTokens as ex:
             #print('End of tokens')
             if fullResult is None:
-                #print(f'Unwinding end of tokens:  {ex.inside.name}, stack: {fullResult and fullResult[1]}')
+                #print(f'Unwinding end of tokens:  {ex.inside.name}, position: {pos}')
                 raise
-            elif fullResult[1]:
+            elif fullResult[1] < len(context.tokens):
                 raise ParseError(self, [], True) from ex
         except ParseError:
             #print(f'ex: {ex.__class__}, {ex.inside.name}, {ex.endOfTokens}')
@@ -185,13 +291,93 @@ class Production:
                 raise
 
         #print(' '*offset, f'* Returning {self.name} parse result {fullResult}')
-        return cast(Tuple[Eval, ParseStack, bool], fullResult)
+        return cast(ParseResult, fullResult)
 
 
     def __repr__(self) -> str:
         return 'Prod[%s]' % self.name if self.name else 'Prod[UNKNOWN]'
 
 
+# Operator precedence; higher binds tighter, and unlisted operators get the default
+precedence:Dict[str,int] = \
+    { '||': 1
+    , '&&': 2
+    , '==': 3
+    , '~=': 3
+    , '<': 3
+    , '>': 3
+    , '|': 4
+    , '+': 5
+    , '-': 5
+    , '*': 6
+    , '/': 6
+    }
+DefaultPrecedence = 7
+
+
+def getPrecedence(token:Union[Eval, Token, None]) -> Optional[int]:
+    if not isinstance(token, Op):
+        return None
+    return precedence.get(token.text, DefaultPrecedence)
+
+
+# Parses a chain of binary operators in one go, by precedence climbing
+class OperatorProduction(Production):
+    @property
+    def operatorPat(self) -> Production:
+        return cast(Production, cast(Rule, self.rules[0])[1][1])
+
+
+    @property
+    def operandPat(self) -> Production:
+        return cast(Production, cast(Rule, self.rules[0])[1][2])
+
+
+    def parseLoop(self,
+            context:ParseContext,
+            pos:int,
+            head:Optional[Eval],
+            recursed:List[Tuple['Production',int]],
+            offset:int
+            ) -> ParseResult:
+        if head is None:
+            raise ParseError(self, [Eval], False)
+
+        current = context.peek(pos, None)
+        if current is None:
+            raise EndOfTokens(self)
+        if getPrecedence(current) is None:
+            raise ParseError(self, [Op], False)
+
+        return self.climb(context, pos, head, offset, 0)
+
+
+    def climb(self, context:ParseContext, pos:int, left:Eval, offset:int, minimum:int) -> ParseResult:
+        eot = False
+        level = getPrecedence(context.peek(pos, None))
+
+        while level is not None and level >= minimum:
+            op, pos, _ = self.operatorPat.parse(context, pos, None, [], offset+1)
+
+            if context.peek(pos, None) is None:
+                raise EndOfTokens(self)
+
+            right, pos, endOfTokens = self.operandPat.parse(context, pos, None, [], offset+1)
+            eot = eot or endOfTokens
+            nextLevel = getPrecedence(context.peek(pos, None))
+
+            # Anything that binds tighter takes our right operand as its left
+            while nextLevel is not None and nextLevel > level:
+                right, pos, endOfTokens = self.climb(context, pos, right, offset, nextLevel)
+                eot = eot or endOfTokens
+                nextLevel = getPrecedence(context.peek(pos, None))
+
+            left = cast(Rule, self.rules[0])[0].parse(left, op, right) #type:ignore
+            level = nextLevel
+
+        return (left, pos, eot)
+
+
 expression = Production(name='expression')
 
 constant = Production(
@@ -222,6 +408,13 @@ objectRef.extend(
     (ObjectRef, [Eval, Dot, Sym]),
     )
 
+# A variable, or a property of one: what can be assigned to
+reference = Production(
+    variable,
+    objectRef,
+    name='reference'
+    )
+
 elementList = Production(name='elementList')
 elementList.extend(
     (ElementList, [ElementList, Comma, expression]),
@@ -266,13 +459,15 @@ dictObject = Production(
     )
 
 call = Production(
-    (Call, [expression, LParen, argList, RParen]),
-    (Call, [expression, LParen, RParen]),
+    (Call, [Eval, LParen, argList, RParen]),
+    (Call, [Eval, LParen, RParen]),
     name='call'
     )
 
-opcall = Production(
-    (OpCall, [Eval, operator, expression]),
+operand = Production(name='operand')
+
+opcall = OperatorProduction(
+    (OpCall, [Eval, operator, operand]),
     name='opcall'
     )
 
@@ -302,13 +497,6 @@ define = Production(
     name='let'
     )
 
-lvalue = Production(
-    define,
-    objectRef,
-    variable,
-    name='lvalue'
-    )
-
 rvalue = Production(
     expression,
     name='rvalue'
@@ -332,7 +520,8 @@ imprt = Production(
 
 
 assignment = Production(
-    (Assignment, [lvalue, Eq, rvalue]),
+    (Assignment, [define, Eq, rvalue]),
+    (Assignment, [reference, Eq, rvalue]),
     name='assignment'
     )
 
@@ -343,8 +532,9 @@ block = Production(
     )
 
 
-expression.extend(
-    variable,
+# Anything that can be the operand of a binary operator
+operand.extend(
+    reference,
     array,
     dictObject,
     constant,
@@ -355,11 +545,16 @@ expression.extend(
     ifthen,
     subscript,
     call,
-    opcall,
     group,
-    block,
     objectRef,
     )
+
+expression.extend(
+    operand,
+    # Left recursive
+    opcall,
+    block,
+    )
     
 
 statement = Production(
@@ -373,19 +568,103 @@ statement = Production(
     )
 
 
+def computeFirstSets(start:Production) -> None:
+    productions:List[Production] = []
+    pending = [start]
+
+    while pending:
+        production = pending.pop()
+        if production in productions:
+            continue
+        productions.append(production)
+        production.firstTokens = [set() for _ in production.rules]
+        production.firstEvals = [() for _ in production.rules]
+
+        for rule in production.rules:
+            pending.extend(pat for pat in ([rule] if isinstance(rule, Production) else rule[1])
+                if isinstance(pat, Production))
+
+    # Fold in the FIRST sets of the productions each rule starts with until nothing changes
+    changed = True
+    while changed:
+        changed = False
+
+        for production in productions:
+            for index, rule in enumerate(production.rules):
+                leading = rule if isinstance(rule, Production) else rule[1][0]
+                tokens:Set[Type[Token]] = set(production.firstTokens[index])
+                evals:Set[Type[Eval]] = set(production.firstEvals[index])
+
+                if isinstance(leading, Production):
+                    for firstTokens in leading.firstTokens:
+                        tokens |= firstTokens
+                    for firstEvals in leading.firstEvals:
+                        evals |= set(firstEvals)
+                elif issubclass(leading, Token):
+                    tokens.add(leading)
+                else:
+                    evals.add(leading)
+
+                if tokens != production.firstTokens[index] or evals != set(production.firstEvals[index]):
+                    production.firstTokens[index] = tokens
+                    production.firstEvals[index] = tuple(evals)
+                    changed = True
+
+
+computeFirstSets(statement)
+
+# The context of the most recent parse, to see how much work it took
+LastParse:Optional[ParseContext] = None
+
+
 # TODO: Need a more nuanced way to communicate partial results than exceptions
 def parse(tokens:List[Token]) -> List[Eval]:
+    return parseContext(ParseContext(tokens))
+
+
+def parseContext(context:ParseContext) -> List[Eval]:
+    global LastParse #pylint: disable=global-statement
     results = []
-    stack = cast(ParseStack, tokens)
+    LastParse = context
 
-    result, stack, endOfTokens = statement.parse(stack, [], 0)
+    try:
+        result, pos, endOfTokens = statement.parse(context, 0, None, [], 0)
+    except ParseError as ex:
+        ex.token = context.furthest()
+        raise
+    finally:
+        debug('parse: %s rule attempts, %s pruned' % (context.attempts, context.pruned))
 
-    if stack:
-        #print('Raising ParseError because of left-over stack; endOfTokens: ', endOfTokens)
-        #print('stack: %s', stack)
-        raise ParseError(None, [], endOfTokens)
+    if pos < len(context.tokens):
+        #print('Raising ParseError because of left-over tokens; endOfTokens: ', endOfTokens)
+        #print('remaining: %s', context.tokens[pos:])
+        raise ParseError(None, [], endOfTokens, context.furthest())
 
     results.append(result)
 
     return results
 
+
+# Parses a statement read a line at a time, keeping the last try's memo less the entries that looked past its end
+class IncrementalParser:
+    def __init__(self) -> None:
+        # The last try, unless it parsed (its results could be evaluated, and evaluation changes them)
+        self.context:Optional[ParseContext] = None
+
+    def __call__(self, tokens:List[Token]) -> List[Eval]:
+        context = ParseContext(tokens)
+        last = self.context
+        self.context = None
+
+        if last is not None \
+                and len(last.tokens) < len(context.tokens) \
+                and context.tokens[:len(last.tokens)] == last.tokens:
+            for key in last.ended:
+                del last.memo[key]
+            context.memo = last.memo
+
+        try:
+            return parseContext(context)
+        except (ParseError, EndOfTokens, PartialParseError):
+            self.context = context
+            raise
@@ -1,8 +1,8 @@
-from typing import Tuple, Optional, List
+from typing import cast, Optional, List, Dict, Type
 import sys
 import re
 from .environment import Environment
-from .token import Token, tokens
+from .token import Token, tokens, location
 
 class UntokenizableError(Exception):
     def __init__(self, msg:str) -> None:
@@ -13,16 +13,12 @@ class EndOfFile(Exception):
     pass
 
 
-def readToken(line:str) -> Optional[Tuple[Token,str]]:
-    for (token, exp) in tokens:
-        match = exp.match(line)
-        if match:
-            text = match.group(0)
-            line = line[len(text):]
-
-            return (token(text), line.lstrip())
-
-    return None
+# Every token pattern as one, in order, each in a group named after its token type
+TokenPattern = re.compile(
+    '(?:%s)\\s*' % '|'.join('(?P<%s>%s)' % (token.__name__, exp.pattern) for token, exp in tokens))
+# The token type for each group number of the pattern that's the whole of a token's pattern
+TokenTypes:Dict[int, Type[Token]] = {TokenPattern.groupindex[token.__name__]: token for token, _ in tokens}
+Whitespace = re.compile(r'\s*')
 
 
 def tabCompleter(environment:Environment, text:str, state:int) -> Optional[str]:
@@ -64,28 +60,28 @@ def tabCompleter(environment:Environment, text:str, state:int) -> Optional[str]:
         return None
 
 
-def readTokens(line:str) -> List[Token]:
+def readTokens(line:str, lineNumber:int=0) -> List[Token]:
     tokens = []
+    pos = cast(re.Match, Whitespace.match(line)).end()
 
-    line = line.lstrip()
+    match = TokenPattern.match(line, pos)
 
-    while line:
-        if line[0] == '#':
-            break
-            
-        result = readToken(line)
-        if not result:
-            raise UntokenizableError('Unrecognized text: '+line[:20])
+    # Stops at the end of the line, at a comment, or at something that isn't a token
+    while match:
+        group = cast(int, match.lastindex)
+        tokens.append(TokenTypes[group](match.group(group), lineNumber, pos))
+        pos = match.end()
+        match = TokenPattern.match(line, pos)
 
-        token, line = result
-        tokens.append(token)
+    if pos < len(line) and line[pos] != '#':
+        raise UntokenizableError('Unrecognized text%s: %s' % (location(lineNumber, pos), line[pos:pos+20]))
 
     #print('Read tokens: ', tokens)
 
     return tokens
     
 
-def read(environment:Environment, tokens:List[Token]) -> List[Token]:
+def read(environment:Environment, tokens:List[Token], lineNumber:int=0) -> List[Token]:
     if environment.input == sys.stdin:
         if tokens:
             prompt = environment.getVariableValue('*continue')
@@ -101,5 +97,5 @@ def read(environment:Environment, tokens:List[Token]) -> List[Token]:
         if not line:
             raise EndOfFile()
     #print('Read command: ', line)
-    return tokens + readTokens(line)
+    return tokens + readTokens(line, lineNumber)
 
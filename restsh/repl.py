@@ -1,10 +1,14 @@
-from typing import cast, List
+from typing import cast, List, Optional, Callable, Dict, Tuple, Type
 import traceback
+import pickle
 from . import terminal
 from .environment import Environment, EvaluationError, Cell
-from .token import Token
-from .reader import read, EndOfFile, UntokenizableError
-from .parser import parse, ParseError, PartialParseError, EndOfTokens
+from .token import Token, location, LParen, RParen, LBrace, RBrace, LBracket, RBracket
+from .reader import read, readTokens, EndOfFile, UntokenizableError
+from .parser import IncrementalParser, ParseError, PartialParseError, EndOfTokens
+from . import ngparser
+from . import cache
+from .cache import Step, PrintStep, EvaluateStep
 from .evaluate import Eval
 from .debug import debug
 
@@ -15,9 +19,54 @@ def printable(value:Eval) -> bool:
         return value.interactivePrint
     
 
+# A parser for statements read a line at a time, which carries on from its last try when it's given more of a statement
+def getParser(environment:Environment) -> Callable[[List[Token]], List[Eval]]:
+    return ngparser.IncrementalParser() if environment.ngParser else IncrementalParser()
+
+
+def printError(environment:Environment, message:str) -> None:
+    terminal.setForeground(environment.output, 'red')
+    environment.print(message)
+    terminal.reset(environment.output)
+
+
+def parseErrorMessage(ex:ParseError) -> str:
+    return 'parse error%s, expected one of: %s' % (
+        location(ex.token.line, ex.token.column) if ex.token is not None else '',
+        ', '.join([token.__name__ for token in set(ex.tokens)]))
+
+
+def printParseError(environment:Environment, ex:ParseError) -> None:
+    printError(environment, parseErrorMessage(ex))
+
+
+# Evaluate the expressions of a statement, printing each result if echo is set (and the expression is worth printing)
+def evaluateStatement(environment:Environment, exprs:List[Eval], echo:bool) -> None:
+    try:
+        #print('expressions: %s' % exprs)
+        for expr in exprs:
+            terminal.setTitle(environment.output, repr(expr)[:30])
+            result = expr.compile()(environment)
+            if echo and printable(expr):
+                terminal.setForeground(environment.output, environment.getVariable('*resultcolor').value)
+                environment.print('%s' % repr(result))
+                terminal.reset(environment.output)
+            environment.lastResult = result
+    except EvaluationError as ex:
+        if environment.debugErrors:
+            terminal.setForeground(environment.output, 'red')
+            traceback.print_exception(ex)
+            terminal.reset(environment.output)
+    except Exception as ex:
+        printError(environment, 'INTERNAL INTERPRETER ERROR: %s' % str(ex))
+        if environment.debugErrors:
+            raise
+
+
 def repLoop(environment:Environment) -> Eval:
-    parser = parse
+    parser = getParser(environment)
     tokens:List[Token] = []
+    lineNumber = 0
 
     while environment.loop:
         previousTokens = tokens
@@ -28,7 +77,8 @@ def repLoop(environment:Environment) -> Eval:
 
         try:
             try:
-                tokens = read(environment, previousTokens)
+                lineNumber += 1
+                tokens = read(environment, previousTokens, lineNumber)
                 debug('tokenized: %s' % tokens)
             except EndOfFile:
                 if previousTokens and environment.interactive:
@@ -50,52 +100,24 @@ def repLoop(environment:Environment) -> Eval:
                     if ex.endOfTokens:
                         #print('ParseError end of tokens True')
                         if previousTokens == tokens:
-                            terminal.setForeground(environment.output, 'red')
-                            environment.print('parse error')
-                            terminal.reset(environment.output)
+                            printError(environment, 'parse error')
                             tokens = []
                         else:
                             continue
                     else:
-                        terminal.setForeground(environment.output, 'red')
-                        environment.print(
-                            'parse error, expected one of: %s' % \
-                            ', '.join([token.__name__ for token in set(ex.tokens)]))
-                        terminal.reset(environment.output)
+                        printParseError(environment, ex)
                         tokens = []
                 except EndOfTokens:
                     #print('END OF TOKENS')
                     if previousTokens == tokens:
-                        terminal.setForeground(environment.output, 'red')
-                        environment.print('parse error')
-                        terminal.reset(environment.output)
+                        printError(environment, 'parse error')
                         tokens = []
                     else:
                         continue
             
             if exprs:
-                try:
-                    #print('expressions: %s' % exprs)
-                    for expr in exprs:
-                        terminal.setTitle(environment.output, repr(expr)[:30])
-                        result = expr.evaluate(environment)
-                        # TODO: Just have a way to turn this off
-                        if environment.input.isatty() and environment.output.isatty() and printable(expr):
-                            terminal.setForeground(environment.output, environment.getVariable('*resultcolor').value)
-                            environment.print('%s' % repr(result))
-                            terminal.reset(environment.output)
-                        environment.lastResult = result
-                except EvaluationError as ex:
-                    if environment.debugErrors:
-                        terminal.setForeground(environment.output, 'red')
-                        traceback.print_exception(ex)
-                        terminal.reset(environment.output)
-                except Exception as ex:
-                    terminal.setForeground(environment.output, 'red')
-                    environment.print('INTERNAL INTERPRETER ERROR: %s' % str(ex))
-                    terminal.reset(environment.output)
-                    if environment.debugErrors:
-                        raise
+                # TODO: Just have a way to turn this off
+                evaluateStatement(environment, exprs, environment.input.isatty() and environment.output.isatty())
                     
         except KeyboardInterrupt:
             print('')
@@ -104,3 +126,193 @@ def repLoop(environment:Environment) -> Eval:
     return cast(Eval, environment.lastResult)
 
 
+# How much each token changes the bracket nesting
+Nesting:Dict[Type[Token], int] = \
+    { LParen: 1
+    , LBrace: 1
+    , LBracket: 1
+    , RParen: -1
+    , RBrace: -1
+    , RBracket: -1
+    }
+
+
+# Runs a whole script, tokenizing each line once. Line ends inside brackets aren't tried as statement ends, unless the
+# statement turns out to be an error, when it's replayed like the REPL would have. Given steps, it records them there.
+class Script:
+    def __init__(self, environment:Environment, steps:Optional[List[Step]]=None) -> None:
+        self.environment = environment
+        self.parser = getParser(environment)
+        self.steps = steps
+        # The operator precedence the last recorded statement was parsed with
+        self.precedence:cache.Precedence = ()
+        # The lines of the statement so far (with their line numbers), and all of their tokens
+        self.lines:List[Tuple[int, List[Token]]] = []
+        self.tokens:List[Token] = []
+        self.depth = 0
+        # Whether a line end was passed over without trying to parse the statement
+        self.skipped = False
+        # Whether the last try at the statement ran out of tokens
+        self.endOfTokens = False
+
+    def reset(self) -> None:
+        self.lines = []
+        self.tokens = []
+        self.depth = 0
+        self.skipped = False
+        self.endOfTokens = False
+
+    def run(self, source:str) -> Eval:
+        for lineNumber, line in enumerate(source.splitlines(), start=1):
+            if not self.environment.loop:
+                break
+
+            try:
+                self.addLine(lineNumber, readTokens(line, lineNumber))
+            except UntokenizableError as ex:
+                self.report(ex.message, False)
+                self.reset()
+            except KeyboardInterrupt:
+                # The steps are missing whatever was interrupted
+                self.steps = None
+                print('')
+
+        # An unfinished statement at the end is dropped, unless the REPL would have found it was an error
+        if self.skipped and self.environment.loop:
+            self.replay()
+
+        return cast(Eval, self.environment.lastResult)
+
+    def addLine(self, lineNumber:int, tokens:List[Token], replaying:bool=False) -> None:
+        if not tokens:
+            if self.endOfTokens:
+                self.report('parse error', True)
+                self.reset()
+            return
+
+        self.lines.append((lineNumber, tokens))
+        self.tokens.extend(tokens)
+        self.depth = max(0, self.depth + sum(Nesting.get(type(token), 0) for token in tokens))
+
+        if self.depth > 0 and not replaying:
+            self.skipped = True
+            return
+
+        try:
+            exprs = self.parser(self.tokens)
+        except PartialParseError:
+            self.endOfTokens = False
+            return
+        except (ParseError, EndOfTokens) as ex:
+            if not isinstance(ex, ParseError) or ex.endOfTokens:
+                self.endOfTokens = True
+                return
+            if self.skipped:
+                self.replay()
+                return
+            self.report(parseErrorMessage(ex), True)
+            exprs = []
+
+        debug('statement: %s' % exprs)
+        if exprs:
+            self.record(exprs)
+        self.reset()
+        evaluateStatement(self.environment, exprs, False)
+
+    def replay(self) -> None:
+        lines = self.lines
+        self.reset()
+
+        for lineNumber, tokens in lines:
+            if not self.environment.loop:
+                break
+            self.addLine(lineNumber, tokens, True)
+
+    def report(self, message:str, error:bool) -> None:
+        if error:
+            printError(self.environment, message)
+        else:
+            self.environment.print(message)
+
+        if self.steps is not None:
+            self.steps.append(PrintStep(message, error))
+
+    def record(self, exprs:List[Eval]) -> None:
+        if self.steps is None:
+            return
+
+        current = cache.currentPrecedence()
+        if current != self.precedence:
+            self.precedence = current
+
+        try:
+            self.steps.append(EvaluateStep(
+                self.lines[0][0],
+                self.lines[-1][0],
+                self.precedence,
+                pickle.dumps(exprs, pickle.HIGHEST_PROTOCOL)))
+        except (pickle.PicklingError, TypeError, AttributeError) as ex:
+            debug('Cannot cache statement %s: %s' % (exprs, ex))
+            self.steps = None
+
+
+# Parses a statement from the cache again, for when the operator precedence isn't what it was parsed with
+def reparseStep(environment:Environment, step:EvaluateStep, lines:List[str]) -> List[Eval]:
+    tokens = \
+        [ token
+          for lineNumber in range(step.firstLine, step.lastLine + 1)
+          for token in readTokens(lines[lineNumber - 1], lineNumber)
+        ]
+
+    return getParser(environment)(tokens)
+
+
+# Runs a script from the steps a Script recorded, without tokenizing or parsing it (unless operator precedence changed)
+def runSteps(environment:Environment, steps:List[Step], source:str) -> Eval:
+    lines:List[str] = []
+
+    for step in steps:
+        if not environment.loop:
+            break
+
+        try:
+            if isinstance(step, EvaluateStep):
+                if step.precedence == cache.currentPrecedence():
+                    exprs = pickle.loads(step.exprs)
+                else:
+                    lines = lines or source.splitlines()
+                    exprs = reparseStep(environment, step, lines)
+                evaluateStatement(environment, exprs, False)
+            elif step.error:
+                printError(environment, step.message)
+            else:
+                environment.print(step.message)
+        except KeyboardInterrupt:
+            print('')
+
+    return cast(Eval, environment.lastResult)
+
+
+def runScript(environment:Environment, source:str) -> Eval:
+    return Script(environment).run(source)
+
+
+# Runs a script file, from the cache if it's been run before and hasn't changed since
+def runFile(environment:Environment, filename:str) -> Eval:
+    with open(filename, 'r', encoding='utf-8') as sourceFile:
+        source = sourceFile.read()
+
+    key = cache.sourceKey(filename, source, 'ng' if environment.ngParser else 'packrat')
+    steps = cache.loadSteps(environment, filename, key)
+
+    if steps is not None:
+        debug('running %s from the cache' % filename)
+        return runSteps(environment, steps, source)
+
+    script = Script(environment, [])
+    result = script.run(source)
+
+    if script.steps is not None:
+        cache.saveSteps(environment, filename, key, script.steps)
+
+    return result
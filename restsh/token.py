@@ -2,73 +2,111 @@ from typing import Tuple, Type, List
 import re
 
 class Token:
+    __slots__ = ('text', 'line', 'column')
     openParse = True
 
-    def __init__(self, text:str) -> None:
+    def __init__(self, text:str, line:int=0, column:int=0) -> None:
         self.text:str = text
+        # Where the token was read from (line 0 if it wasn't)
+        self.line:int = line
+        self.column:int = column
 
     def __repr__(self) -> str:
         return '%s(%s)' % (self.__class__.__name__, self.text)
 
-class Eq(Token): pass
 
-class Dot(Token): pass
+# Where something was read from, for messages
+def location(line:int, column:int) -> str:
+    return ' at line %d, column %d' % (line, column + 1) if line else ''
 
-class LParen(Token): pass
 
-class RParen(Token): pass
+class Eq(Token):
+    __slots__ = ()
 
-class LAngle(Token): pass
+class Dot(Token):
+    __slots__ = ()
 
-class RAngle(Token): pass
+class LParen(Token):
+    __slots__ = ()
 
-class LBrace(Token): pass
+class RParen(Token):
+    __slots__ = ()
 
-class RBrace(Token): pass
+class LAngle(Token):
+    __slots__ = ()
 
-class LBracket(Token): pass
+class RAngle(Token):
+    __slots__ = ()
 
-class RBracket(Token): pass
+class LBrace(Token):
+    __slots__ = ()
 
-class Comma(Token): pass
+class RBrace(Token):
+    __slots__ = ()
 
-class Colon(Token): pass
+class LBracket(Token):
+    __slots__ = ()
 
-class SemiColon(Token): pass
+class RBracket(Token):
+    __slots__ = ()
 
-class Bang(Token): pass
+class Comma(Token):
+    __slots__ = ()
 
-class BSlash(Token): pass
+class Colon(Token):
+    __slots__ = ()
 
-class Let(Token): pass
+class SemiColon(Token):
+    __slots__ = ()
 
-class Imp(Token): pass
+class Bang(Token):
+    __slots__ = ()
+
+class BSlash(Token):
+    __slots__ = ()
+
+class Let(Token):
+    __slots__ = ()
+
+class Imp(Token):
+    __slots__ = ()
 
 class Help(Token):
+    __slots__ = ()
     openParse = False
 
-class Ext(Token): pass
+class Ext(Token):
+    __slots__ = ()
 
-class Try(Token): pass
+class Try(Token):
+    __slots__ = ()
 
-class If(Token): pass
+class If(Token):
+    __slots__ = ()
 
-class Then(Token): pass
+class Then(Token):
+    __slots__ = ()
 
-class Else(Token): pass
+class Else(Token):
+    __slots__ = ()
 
 class Sym(Token):
+    __slots__ = ()
     openParse = False
 
-class Op(Token): pass
+class Op(Token):
+    __slots__ = ()
 
 class Str(Token):
+    __slots__ = ()
     openParse = False
 
 class Flt(Token):
+    __slots__ = ()
     openParse = False
 
 class Int(Token):
+    __slots__ = ()
     openParse = False
 
 tokens:List[Tuple[Type[Token], re.Pattern]] = \
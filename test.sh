@@ -8,4 +8,6 @@ python -m compileall -l .
 mypy -p $PROJECT
 pylint $PROJECT/*.py #$PROJECT/*/*.py
 #pytest --disable-warnings tests/
+tests/run.sh
+python tests/compare-parsers.py
 python setup.py check && echo " ...passed."
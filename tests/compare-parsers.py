@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# Checks that the default and the --ng-parser parsers agree on every line of tests/parser-corpus.txt, on each of its
+# prefixes, and on random lines: python3 tests/compare-parsers.py [seed]
+import os
+import random
+import sys
+from typing import Any, Callable, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.setrecursionlimit(100000)
+
+#pylint: disable=wrong-import-position
+from restsh.environment import Cell
+from restsh.reader import readTokens, UntokenizableError
+from restsh.token import Token
+from restsh.parser import parse, precedence, EndOfTokens, ParseError, PartialParseError
+from restsh.ngparser import parse as ngparse
+
+Operators = ['+', '-', '*', '/', '&&', '||', '==', '<', '|', '++', '~=']
+Words = '( ) [ ] { } , : ; . \\ ! if then else let import help exit try = + * a b 1 "s"'.split()
+
+
+def dump(value:Any) -> Any:
+    if isinstance(value, Cell):
+        return ['Cell', dump(value.value)]
+    if isinstance(value, (list, tuple)):
+        return [dump(item) for item in value]
+    if isinstance(value, dict):
+        return {key: dump(item) for key, item in value.items()}
+    if isinstance(value, Token):
+        return [type(value).__name__, value.text]
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+
+    names = set(getattr(value, '__dict__', {}))
+    for cls in type(value).__mro__:
+        names.update(name for name in getattr(cls, '__slots__', ()) if hasattr(value, name))
+
+    return [type(value).__name__, {name: dump(getattr(value, name)) for name in sorted(names)}]
+
+
+# What a parser makes of a line; the tokens a parse error expects are left out, as only the LALR parser lists them
+def outcome(tokens:List[Token], parser:Callable[[List[Token]], Any]) -> Any:
+    try:
+        return ['parsed', dump(parser(tokens))]
+    except ParseError as ex:
+        return ['error', ex.endOfTokens, next((index for index, token in enumerate(tokens) if token is ex.token), None)]
+    except PartialParseError:
+        return ['partial']
+    except EndOfTokens:
+        return ['end of tokens']
+
+
+def expression(rand:random.Random, depth:int) -> str:
+    if depth <= 0:
+        return rand.choice(['a', '1', '"s"', '2.5', 'b'])
+
+    def inner() -> str:
+        return expression(rand, depth - 1)
+
+    choices = \
+        [ lambda: '%s %s %s' % (inner(), rand.choice(Operators), inner())
+        , lambda: '(%s)' % inner()
+        , lambda: 'if %s then %s else %s' % (inner(), inner(), inner())
+        , lambda: '\\x, y. %s' % inner()
+        , lambda: '%s(a: %s)' % (rand.choice(['f', 'a.b', 'g(x: 1)']), inner())
+        , lambda: '[%s, %s]' % (inner(), inner())
+        , lambda: '{k: %s}' % inner()
+        , lambda: '!%s' % inner()
+        , lambda: 'try %s' % inner()
+        , lambda: '%s; %s' % (inner(), inner())
+        , lambda: 'a[%s].c' % inner()
+        , inner
+        ]
+
+    return rand.choice(choices)()
+
+
+def randomLines(seed:int) -> List[str]:
+    rand = random.Random(seed)
+    lines = []
+
+    for _ in range(500):
+        line = expression(rand, rand.randint(1, 4))
+        lines.append(line)
+        lines.append(rand.choice(['x = ', 'let y = ', 'a.b = ', 'a[1].b = ', 'help ']) + line)
+
+    for _ in range(500):
+        lines.append(' '.join(rand.choice(Words) for _ in range(rand.randint(1, 7))))
+
+    return lines
+
+
+def main() -> None:
+    seed = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+    with open(os.path.join(os.path.dirname(__file__), 'parser-corpus.txt'), encoding='utf-8') as corpus:
+        lines = corpus.read().splitlines()
+
+    for line in list(lines):
+        words = line.split(' ')
+        lines.extend(' '.join(words[:count]) for count in range(1, len(words)))
+
+    lines.extend(randomLines(seed))
+    failed = 0
+
+    for table in [{}, {'+': 1, '*': 9, '||': 7}]:
+        saved = dict(precedence)
+        precedence.update(table)
+
+        for line in lines:
+            try:
+                tokens = readTokens(line)
+            except UntokenizableError:
+                continue
+
+            packrat = outcome(tokens, parse)
+            lalr = outcome(tokens, ngparse)
+            if packrat != lalr:
+                failed += 1
+                print('%r\n  default: %.150s\n  ng:      %.150s' % (line, packrat, lalr))
+
+        precedence.clear()
+        precedence.update(saved)
+
+    print('%d lines, %d differ' % (len(lines) * 2, failed))
+    sys.exit(1 if failed else 0)
+
+
+main()
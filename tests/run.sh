@@ -0,0 +1,28 @@
+#!/bin/bash
+# Runs each test script that has its expected output beside it (name.out) with both parsers, and the Python checks:
+# ./tests/run.sh
+cd "$(dirname "$0")/.."
+
+home=$(mktemp -d)
+trap 'rm -rf "$home"' EXIT
+failed=0
+
+for expected in tests/*.out; do
+    script="${expected%.out}.rsh"
+
+    for parser in "" "--ng-parser"; do
+        if ! diff -u "$expected" <(HOME="$home" python3 -m restsh --skip-rc $parser "$script" 2>&1); then
+            echo "FAILED: $script $parser"
+            failed=1
+        fi
+    done
+done
+
+for check in tests/*.py; do
+    if ! HOME="$home" python3 "$check"; then
+        echo "FAILED: $check"
+        failed=1
+    fi
+done
+
+exit $failed
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# Checks that a script changing the arrays and objects made from decoded JSON leaves the decoded data as it was:
+# python3 tests/views.py
+import argparse
+import copy
+import io
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+#pylint: disable=wrong-import-position
+from restsh.__main__ import createBaseEnv
+from restsh.environment import Environment
+from restsh.evaluate import wrap
+from restsh.repl import runScript
+
+Response = \
+    { 'value':
+        [ {'id': 'a', 'owner': {'name': 'Ann'}, 'tags': ['x', 'y']}
+        , {'id': 'b', 'owner': {'name': 'Bob'}, 'tags': []}
+        ]
+    , 'count': 2
+    }
+
+Script = '''
+let first = response.value[0]
+first.id = "changed"
+let owner = response.value[1].owner
+owner.name = "Cy"
+first.tags = ["z"]
+response.count = 3
+'''
+
+Expected = \
+    [ { 'value':
+          [ {'id': 'changed', 'owner': {'name': 'Ann'}, 'tags': ['z']}
+          , {'id': 'b', 'owner': {'name': 'Cy'}, 'tags': []}
+          ]
+      , 'count': 3
+      }
+    , Response
+    ]
+
+
+def main() -> None:
+    environment = Environment(createBaseEnv(argparse.Namespace(scriptargs=[])))
+    environment.output = io.StringIO()
+    decoded = copy.deepcopy(Response)
+
+    # Two views of the same decoded data, as two reads of a cached response would be
+    environment.setVariable('response', wrap(decoded))
+    environment.setVariable('again', wrap(decoded))
+    runScript(environment, Script)
+
+    views = [environment.getVariableValue(name).toPython() for name in ['response', 'again']]
+    failed = 0
+
+    if environment.output.getvalue():
+        failed += 1
+        print('the script printed:\n  %s' % environment.output.getvalue())
+
+    if views != Expected:
+        failed += 1
+        print('the views of the response are:\n  %s\nnot:\n  %s' % (views, Expected))
+
+    if decoded != Response:
+        failed += 1
+        print('the decoded response was changed to:\n  %s' % decoded)
+
+    print('%d checks, %d failed' % (3, failed))
+    sys.exit(1 if failed else 0)
+
+
+main()